@@ -1,10 +1,17 @@
 import pandas as pd
 import pathlib
+import sys
 from typing import Dict, List
 from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
 from openpyxl.utils.dataframe import dataframe_to_rows
 
+# Permite importar os módulos da raiz do projeto (ex.: frota.py) ao rodar a partir de auxiliar/
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import frota
+from planilha import AMOSTRA_LARGURAS, larguras_automaticas
+
 class SAFComFalhasAnalyzer:
     """Classe para análise de SAFs com falhas do equipamento"""
     
@@ -49,24 +56,12 @@ class SAFComFalhasAnalyzer:
     @staticmethod
     def _get_linhas_config() -> Dict[str, List[str]]:
         """Retorna a configuração de veículos por linha"""
-        return {
-            'Linha Sul': ['TUE'],
-            'Linha Oeste': ['VLT01', 'VLT02', 'VLT03', 'VLT04', 'VLT05', 'VLT06'],
-            'Linha Parangaba - Mucuripe': ['VLT07', 'VLT08', 'VLT09', 'VLT10', 'VLT11', 'VLT12', 'VLT13'],
-            'Linha Sobral': ['VLTS02', 'VLTS03', 'VLTS04', 'VLTS05', 'VLTS06'],
-            'Linha Cariri': ['TRAM1', 'TRAM2', 'VLTC03']
-        }
+        return frota.linhas_por_nome()
     
     def identificar_linha(self, veiculo: str, grupo: str) -> str:
         """Identifica a linha com base no veículo e grupo"""
-        if grupo == 'MATERIAL RODANTE - TUE':
-            return 'Linha Sul'
-        
-        for linha, veiculos in self.linhas_config.items():
-            if veiculo in veiculos:
-                return linha
-        
-        return 'Outra Linha'
+        linha = frota.identificar_linha(veiculo, grupo, exigir_grupo=False)
+        return frota.LINHA_NOME[linha] if linha is not None else frota.OUTRA_LINHA
     
     def processar_falhas(self) -> pd.DataFrame:
         """Processa e organiza os dados de falhas do equipamento"""
@@ -75,9 +70,11 @@ class SAFComFalhasAnalyzer:
         # Criar DataFrame com as colunas necessárias
         falhas_detalhadas = []
         
-        for _, row in self.df.iterrows():
-            # Identificar a linha
-            linha = self.identificar_linha(row['Veiculo'], row['Grupo'])
+        # Identificar a linha de todos os registros de uma vez (mesma regra de `identificar_linha`)
+        linhas = frota.classificar(self.df, exigir_grupo=False).astype(object).map(frota.LINHA_NOME).fillna(frota.OUTRA_LINHA)
+        
+        for idx, row in self.df.iterrows():
+            linha = linhas[idx]
             
             falha_info = {
                 'Data': row['Data de Abertura Saf'].strftime('%d/%m/%Y'),
@@ -141,18 +138,9 @@ class SAFComFalhasAnalyzer:
             for col_idx, value in enumerate(row_data, 1):
                 worksheet.cell(row=row_idx, column=col_idx, value=value)
         
-        # Ajustar largura das colunas
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+        # Ajustar largura das colunas (calculada do DataFrame, sem percorrer as células)
+        for idx, largura in enumerate(larguras_automaticas(df_falhas, amostra=AMOSTRA_LARGURAS), 1):
+            worksheet.column_dimensions[get_column_letter(idx)].width = largura
         
         # Congelar painel (cabeçalhos)
         worksheet.freeze_panes = 'A2'
@@ -2,10 +2,15 @@ import pandas as pd
 import numpy as np
 import datetime
 import pathlib
+import sys
 from typing import Dict, Tuple
 from openpyxl import load_workbook
 from openpyxl.styles import Font
 
+# Permite importar os módulos da raiz do projeto (ex.: frota.py) ao rodar a partir de auxiliar/
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import frota
+
 class SAFSemFalhasAnalyzer:
     """Classe para análise de SAFs sem falhas baseada no Agente Causador"""
     
@@ -15,6 +20,7 @@ class SAFSemFalhasAnalyzer:
         self.df = self._load_data()
         self.linhas_config = self._get_linhas_config()
         self.contadores = self._inicializar_contadores()
+        self._linha_registro = None
         
     def _load_data(self) -> pd.DataFrame:
         """Carrega os dados do arquivo CSV"""
@@ -58,13 +64,7 @@ class SAFSemFalhasAnalyzer:
     @staticmethod
     def _get_linhas_config() -> Dict[str, Tuple[str, list]]:
         """Retorna a configuração de veículos por linha"""
-        return {
-            'sul': ('MATERIAL RODANTE - TUE', None),
-            'oeste': ('MATERIAL RODANTE - VLT', ['VLT01', 'VLT02', 'VLT03', 'VLT04', 'VLT05', 'VLT06']),
-            'nordeste': ('MATERIAL RODANTE - VLT', ['VLT07', 'VLT08', 'VLT09', 'VLT10', 'VLT11', 'VLT12', 'VLT13']),
-            'sobral': ('MATERIAL RODANTE - VLT', ['VLTS02', 'VLTS03', 'VLTS04', 'VLTS05', 'VLTS06']),
-            'cariri': ('MATERIAL RODANTE - VLT', ['TRAM1', 'TRAM2', 'VLTC03'])
-        }
+        return frota.linhas_config()
     
     def _inicializar_contadores(self) -> Dict[str, pd.DataFrame]:
         """Inicializa os dataframes de contagem com dias como linhas e linhas como colunas"""
@@ -84,13 +84,11 @@ class SAFSemFalhasAnalyzer:
         if linha not in self.linhas_config:
             raise ValueError(f"Linha '{linha}' não reconhecida")
         
-        grupo, veiculos = self.linhas_config[linha]
-        filtro = self.df['Grupo'] == grupo
-        
-        if veiculos:
-            filtro = filtro & self.df['Veiculo'].isin(veiculos)
+        # Classificação de todos os registros pelo cadastro da frota (feita uma única vez)
+        if self._linha_registro is None:
+            self._linha_registro = frota.classificar(self.df)
         
-        return self.df[filtro].copy()
+        return self.df[self._linha_registro == linha].copy()
     
     def _get_mes_ano_referencia(self, df_linha: pd.DataFrame) -> Tuple[int, int]:
         """Obtém o mês e ano de referência a partir dos dados"""
@@ -151,13 +149,8 @@ class SAFSemFalhasAnalyzer:
             ws = wb['sem_falhas']
             
             # Mapeamento das linhas para as colunas na planilha
-            mapeamento_linhas = {
-                'sul': {'coluna_inicial': 'B', 'nome_planilha': 'TUE'},
-                'oeste': {'coluna_inicial': 'F', 'nome_planilha': 'OESTE'},
-                'nordeste': {'coluna_inicial': 'J', 'nome_planilha': 'NORDESTE'},
-                'sobral': {'coluna_inicial': 'N', 'nome_planilha': 'SOBRAL'},
-                'cariri': {'coluna_inicial': 'R', 'nome_planilha': 'CARIRI'}
-            }
+            mapeamento_linhas = {linha: {'coluna_inicial': frota.LINHA_COLUNA[linha], 'nome_planilha': frota.LINHA_PLANILHA[linha]}
+                                 for linha in frota.LINHAS}
             
             # Preencher os dados para cada linha
             for linha_interna, info in mapeamento_linhas.items():
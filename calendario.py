@@ -0,0 +1,86 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+NIVEIS = ['A', 'B', 'C']
+
+# Rótulos dos períodos aceitos por `ContagemCalendario.agregar`
+PERIODOS = {'D': 'Diário', 'W': 'Semanal', 'M': 'Mensal'}
+
+
+class ContagemCalendario:
+    """Contagens por (linha, dia, nível) sobre um intervalo de datas qualquer.
+
+    As contagens ficam em um único array inteiro de forma (linhas, dias,
+    níveis), com um dia por posição a partir de `inicio`; o intervalo pode
+    cobrir vários meses (um trimestre, um ano). Os totais semanais e mensais
+    são obtidos do array diário (`agregar`), e `grade_mensal` devolve a grade
+    de 31 dias usada nas abas do Farol.
+    """
+
+    def __init__(self, inicio, fim, linhas: Sequence[str], niveis: Sequence[str] = NIVEIS):
+        self.inicio = pd.Timestamp(inicio).normalize()
+        self.fim = pd.Timestamp(fim).normalize()
+        self.linhas = list(linhas)
+        self.niveis = list(niveis)
+        self.dias = pd.date_range(self.inicio, self.fim, freq='D', name='Data')
+        self.contagens = np.zeros((len(self.linhas), len(self.dias), len(self.niveis)), dtype=np.int32)
+
+    def adicionar(self, linha: str, datas: pd.Series, niveis: pd.Series, pesos: Optional[pd.Series] = None) -> None:
+        """Soma os registros de uma linha; datas fora do intervalo e níveis desconhecidos são ignorados.
+
+        `pesos` permite somar contagens já agregadas (ex.: um recorte de `cubo.CuboFalhas`).
+        """
+        dia = (datas.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+               - np.datetime64(self.inicio.date(), 'D')).astype(np.int64)
+        nivel = pd.Categorical(niveis, categories=self.niveis).codes.astype(np.int64)
+        validos = datas.notna().to_numpy() & (dia >= 0) & (dia < len(self.dias)) & (nivel >= 0)
+
+        posicoes = dia[validos] * len(self.niveis) + nivel[validos]
+        pesos = pesos.to_numpy()[validos] if pesos is not None else None
+        soma = np.bincount(posicoes, weights=pesos, minlength=len(self.dias) * len(self.niveis))
+        self.contagens[self.linhas.index(linha)] += soma.reshape(len(self.dias), len(self.niveis)).astype(np.int32)
+
+    def diario(self) -> pd.DataFrame:
+        """Uma linha por dia do intervalo e uma coluna por (linha, nível)."""
+        colunas = pd.MultiIndex.from_product([self.linhas, self.niveis], names=['Linha', 'Nível'])
+        valores = self.contagens.transpose(1, 0, 2).reshape(len(self.dias), -1)
+        return pd.DataFrame(valores, index=self.dias, columns=colunas)
+
+    def agregar(self, periodo: str = 'D') -> pd.DataFrame:
+        """Totais por dia ('D'), semana de segunda a domingo ('W') ou mês ('M')."""
+        if periodo not in PERIODOS:
+            raise ValueError(f"Período '{periodo}' não suportado; use um de {list(PERIODOS)}")
+        df = self.diario()
+        if periodo == 'D':
+            return df
+        return df.groupby(df.index.to_period(periodo)).sum()
+
+    def grade_mensal(self, linha: str, ano: int, mes: int) -> np.ndarray:
+        """Contagens (31 dias x níveis) da linha no mês; dias fora do intervalo ficam zerados."""
+        grade = np.zeros((31, len(self.niveis)), dtype=np.int32)
+        primeiro = pd.Timestamp(year=ano, month=mes, day=1)
+        dias_mes = pd.date_range(primeiro, primeiro + pd.offsets.MonthEnd(0), freq='D')
+        dentro = (dias_mes >= self.inicio) & (dias_mes <= self.fim)
+        if dentro.any():
+            offsets = (dias_mes[dentro] - self.inicio).days
+            grade[dias_mes[dentro].day - 1] = self.contagens[self.linhas.index(linha), offsets]
+        return grade
+
+    def tabela(self, periodo: str = 'D', nomes_linhas: Optional[dict] = None) -> pd.DataFrame:
+        """Formato longo (Período, Linha, A, B, C...) para escrita em planilha."""
+        df = self.agregar(periodo)
+        if periodo == 'D':
+            rotulos = df.index.strftime('%d/%m/%Y')
+        elif periodo == 'W':
+            rotulos = [f"{p.start_time:%d/%m/%Y} a {p.end_time:%d/%m/%Y}" for p in df.index]
+        else:
+            rotulos = df.index.strftime('%m/%Y')
+
+        longo = df.stack(level='Linha', future_stack=True).reset_index(level='Linha')
+        longo.insert(0, 'Período', np.repeat(np.asarray(rotulos), len(self.linhas)))
+        if nomes_linhas:
+            longo['Linha'] = longo['Linha'].map(lambda l: nomes_linhas.get(l, l))
+        longo.columns.name = None
+        return longo[['Período', 'Linha'] + self.niveis].reset_index(drop=True)
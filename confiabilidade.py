@@ -0,0 +1,156 @@
+import pathlib
+import sqlite3
+
+import pandas as pd
+
+# Janela (em meses) da taxa móvel de falhas
+JANELA_MESES = 3
+
+# Colunas da aba 'Confiabilidade'
+COLUNAS_INDICADORES = ['Mês', 'Veículo', 'Linha', 'Falhas', 'Falhas Acumuladas', 'Taxa Móvel (falhas/mês)', 'MTBF (dias)']
+
+
+class IndicadoresConfiabilidade:
+    """Indicadores de confiabilidade por veículo (MTBF, falhas por mês, taxa móvel), mantidos de forma incremental.
+
+    As falhas do equipamento ficam em um SQLite local em duas tabelas
+    compactas: contagens por (veículo, dia) e o resumo por (veículo, mês) com
+    quantidade, primeira e última falha. Cada execução substitui apenas os
+    dias do intervalo processado e recalcula o resumo mensal só dos pares
+    (veículo, mês) afetados; só essa atualização é incremental. Os
+    indicadores acumulados (`indicadores`) são recalculados a cada execução
+    sobre todo o resumo mensal, que tem uma linha por veículo e mês e não
+    depende do volume de falhas diárias.
+
+    O MTBF (dias) é o intervalo médio entre falhas consecutivas do veículo,
+    (última - primeira) / (falhas - 1), com as datas truncadas para o dia.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = pathlib.Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._garantir_tabelas()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> 'IndicadoresConfiabilidade':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _garantir_tabelas(self) -> None:
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS falhas_diarias ("
+                " veiculo TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " linha TEXT,"
+                " falhas INTEGER NOT NULL,"
+                " PRIMARY KEY (veiculo, data))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_falhas_diarias_data ON falhas_diarias (data)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS falhas_mensais ("
+                " veiculo TEXT NOT NULL,"
+                " mes TEXT NOT NULL,"
+                " linha TEXT,"
+                " falhas INTEGER NOT NULL,"
+                " primeira TEXT NOT NULL,"
+                " ultima TEXT NOT NULL,"
+                " PRIMARY KEY (veiculo, mes))"
+            )
+
+    def atualizar(self, falhas: pd.DataFrame, inicio, fim) -> int:
+        """Substitui as falhas dos dias de [inicio, fim] e retorna o número de veículos afetados.
+
+        `falhas` tem uma linha por (Data, Veiculo) com 'Linha' e 'Quantidade'
+        (ver `SAFComFalhasAnalyzer.falhas_por_veiculo`); dias fora do
+        intervalo e registros sem veículo são ignorados.
+        """
+        inicio = pd.Timestamp(inicio).strftime('%Y-%m-%d')
+        fim = pd.Timestamp(fim).strftime('%Y-%m-%d')
+
+        falhas = falhas[(falhas['Quantidade'] > 0) & falhas['Data'].notna() & falhas['Veiculo'].notna()]
+        novos = pd.DataFrame({
+            'veiculo': falhas['Veiculo'].astype(str),
+            'data': falhas['Data'].dt.strftime('%Y-%m-%d'),
+            'linha': falhas['Linha'].astype(str),
+            'falhas': falhas['Quantidade'].astype('int64'),
+        })
+        novos = novos[(novos['data'] >= inicio) & (novos['data'] <= fim)]
+        novos = novos.groupby(['veiculo', 'data'], as_index=False).agg(linha=('linha', 'first'), falhas=('falhas', 'sum'))
+
+        with self._conn:
+            # pares (veículo, mês) que tinham falhas no intervalo antes desta execução
+            afetados = set(self._conn.execute(
+                "SELECT DISTINCT veiculo, substr(data, 1, 7) FROM falhas_diarias WHERE data BETWEEN ? AND ?",
+                (inicio, fim)).fetchall())
+            afetados |= set(zip(novos['veiculo'], novos['data'].str[:7]))
+
+            self._conn.execute("DELETE FROM falhas_diarias WHERE data BETWEEN ? AND ?", (inicio, fim))
+            self._conn.executemany(
+                "INSERT INTO falhas_diarias (veiculo, data, linha, falhas) VALUES (?, ?, ?, ?)",
+                zip(novos['veiculo'], novos['data'], novos['linha'], novos['falhas'].tolist()),
+            )
+
+            # resumo mensal recalculado apenas para os pares afetados
+            self._conn.executemany("DELETE FROM falhas_mensais WHERE veiculo = ? AND mes = ?", afetados)
+            self._conn.executemany(
+                "INSERT INTO falhas_mensais (veiculo, mes, linha, falhas, primeira, ultima)"
+                " SELECT veiculo, substr(data, 1, 7), MAX(linha), SUM(falhas), MIN(data), MAX(data)"
+                " FROM falhas_diarias WHERE veiculo = ? AND substr(data, 1, 7) = ? GROUP BY veiculo",
+                afetados,
+            )
+
+        veiculos = {veiculo for veiculo, _ in afetados}
+        print(f"Confiabilidade: {len(novos)} dias com falha no período; "
+              f"{len(veiculos)} veículos e {len(afetados)} meses-veículo recalculados.")
+        return len(veiculos)
+
+    def indicadores(self, janela: int = JANELA_MESES) -> pd.DataFrame:
+        """Falhas por veículo e mês, com acumulado, taxa móvel de `janela` meses e MTBF acumulado.
+
+        Cada veículo aparece do mês da primeira falha até o último mês do
+        histórico (meses sem falha entram com zero na taxa móvel).
+        """
+        mensal = pd.read_sql_query(
+            "SELECT veiculo, mes, linha, falhas, primeira, ultima FROM falhas_mensais ORDER BY veiculo, mes",
+            self._conn)
+        if mensal.empty:
+            return pd.DataFrame(columns=COLUNAS_INDICADORES)
+
+        mensal['mes'] = pd.PeriodIndex(mensal['mes'], freq='M')
+        mensal['primeira'] = pd.to_datetime(mensal['primeira'])
+        mensal['ultima'] = pd.to_datetime(mensal['ultima'])
+
+        # grade completa veículo x mês (do primeiro ao último mês do histórico)
+        meses = pd.period_range(mensal['mes'].min(), mensal['mes'].max(), freq='M')
+        grade = pd.MultiIndex.from_product([mensal['veiculo'].unique(), meses], names=['veiculo', 'mes'])
+        df = mensal.set_index(['veiculo', 'mes']).reindex(grade)
+        df['falhas'] = df['falhas'].fillna(0).astype('int64')
+
+        por_veiculo = df.groupby(level='veiculo', sort=False)
+        df['acumuladas'] = por_veiculo['falhas'].cumsum()
+        df = df[df['acumuladas'] > 0].copy()
+        por_veiculo = df.groupby(level='veiculo', sort=False)
+        df['linha'] = por_veiculo['linha'].ffill()
+        df['taxa'] = (por_veiculo['falhas'].rolling(janela, min_periods=1).mean()
+                      .reset_index(level=0, drop=True))
+        # meses sem falha herdam a primeira/última falha dos meses anteriores
+        primeira = por_veiculo['primeira'].cummin().groupby(level='veiculo', sort=False).ffill()
+        ultima = por_veiculo['ultima'].cummax().groupby(level='veiculo', sort=False).ffill()
+        df['mtbf'] = ((ultima - primeira).dt.days / (df['acumuladas'] - 1)).where(df['acumuladas'] > 1)
+
+        df = df.reset_index()
+        return pd.DataFrame({
+            'Mês': df['mes'].dt.strftime('%m/%Y'),
+            'Veículo': df['veiculo'],
+            'Linha': df['linha'],
+            'Falhas': df['falhas'],
+            'Falhas Acumuladas': df['acumuladas'],
+            'Taxa Móvel (falhas/mês)': df['taxa'].round(2),
+            'MTBF (dias)': df['mtbf'].round(1),
+        })
@@ -0,0 +1,86 @@
+import json
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+import frota
+from ingestao import CacheColunar, ExportacaoSIMG
+
+# Dimensões do cubo (além da data, truncada para o dia, e da linha)
+DIMENSOES = ['Grupo', 'Veiculo', 'Nível', 'Sistema', 'Sub Sistema', 'Agente Causador', 'Nome Status']
+
+# Versão do formato do cubo persistido; incrementar quando as dimensões mudarem
+VERSAO_CUBO = 1
+
+
+class CuboFalhas:
+    """Contagens de SAFs/OSMs agregadas por data, linha, veículo, nível, sistema, agente e status.
+
+    O cubo é montado uma vez a partir da exportação já filtrada (um único
+    groupby sobre o DataFrame bruto) e qualquer recorte usado hoje — grades
+    de 'SAF's Diárias' e 'Sem Falhas', contagens de 'Falhas' — vira um
+    `rollup` sobre ele, sem nova varredura dos registros. A coluna 'Linha'
+    vem de `frota.classificar` (NaN se o registro não pertence a nenhuma
+    linha). Dimensões ausentes na exportação ficam fora do cubo.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    @property
+    def dimensoes(self) -> List[str]:
+        return [c for c in self.df.columns if c != 'Quantidade']
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame, date_col: str) -> 'CuboFalhas':
+        """Agrega os registros de `df` (uma linha do cubo por combinação observada)."""
+        chaves = {'Data': df[date_col].dt.normalize(), 'Linha': frota.classificar(df)}
+        for dim in DIMENSOES:
+            if dim in df.columns:
+                chaves[dim] = df[dim]
+        registros = pd.DataFrame(chaves)
+        cubo = (registros.groupby(list(chaves), observed=True, dropna=False, sort=True)
+                .size().rename('Quantidade').reset_index())
+        return cls(cubo)
+
+    @classmethod
+    def da_exportacao(cls, base: ExportacaoSIMG) -> 'CuboFalhas':
+        """Cubo da exportação, reaproveitado entre execuções quando o CSV de origem não mudou.
+
+        O cubo é gravado ao lado do CSV (`<arquivo>.cubo.parquet`, via
+        `CacheColunar`) e vale para o mesmo intervalo de datas, filtros,
+        dimensões e cadastro da frota. Colunas da base que não entram no cubo
+        (ex.: as de vínculo lidas só pelo `processar_farol`) não fazem parte
+        da chave, para que os scripts compartilhem o mesmo cubo. Bases sem
+        arquivo de origem (ex.: histórico) são agregadas em memória.
+        """
+        cache = None
+        if base.path.is_file():
+            dimensoes = [base.date_col] + [dim for dim in DIMENSOES if dim in base.df.columns]
+            opcoes = json.dumps({'versao': VERSAO_CUBO, 'min_date': base._min_date_input,
+                                 'max_date': base._max_date_input, 'filtros': base.filtros,
+                                 'dimensoes': dimensoes, 'linhas': frota.LINHAS}, sort_keys=True, ensure_ascii=False)
+            cache = CacheColunar(base.path, opcoes, sufixo='cubo')
+            df = cache.carregar()
+            if df is not None:
+                print(f"Cubo reaproveitado para {base.path.name} ({len(df)} combinações).")
+                return cls(df)
+
+        cubo = cls.construir(base.df, base.date_col)
+        print(f"Cubo montado para {base.path.name}: {len(base.df)} registros -> {len(cubo.df)} combinações.")
+        if cache is not None:
+            cache.salvar(cubo.df)
+        return cubo
+
+    def rollup(self, dimensoes: Sequence[str], filtros: Optional[Dict[str, Sequence[str]]] = None) -> pd.DataFrame:
+        """Soma de 'Quantidade' por `dimensoes`, após os `filtros` (coluna -> valores aceitos).
+
+        Os filtros usam o mesmo formato dos predicados dos analisadores;
+        colunas ausentes do cubo são ignoradas, como em `ExportacaoSIMG`.
+        """
+        df = self.df
+        for col, valores in (filtros or {}).items():
+            if col in df.columns:
+                df = df[df[col].isin(valores)]
+        return (df.groupby(list(dimensoes), observed=True, dropna=False, sort=True)['Quantidade']
+                .sum().reset_index())
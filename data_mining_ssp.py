@@ -1,88 +1,52 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime
+import functools
+import hashlib
+import json
+import os
 import unicodedata
 import re
 from pathlib import Path
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.utils import get_column_letter
-
-# Definir os grupos de veículos
-grupos_veiculos = {
-    'oeste': ('MATERIAL RODANTE - VLT', ['VLT01', 'VLT02', 'VLT03', 'VLT04', 'VLT05', 'VLT06']),
-    'nordeste': ('MATERIAL RODANTE - VLT', ['VLT07', 'VLT08', 'VLT09', 'VLT10', 'VLT11', 'VLT12', 'VLT13']),
-    'sobral': ('MATERIAL RODANTE - VLT', ['VLTS02', 'VLTS03', 'VLTS04', 'VLTS05', 'VLTS06']),
-    'cariri': ('MATERIAL RODANTE - VLT', ['TRAM1', 'TRAM2', 'VLTC03'])
-}
+from typing import Dict, Optional, Tuple
+
+import frota
+from ingestao import ler_csv_simg
+from planilha import AMOSTRA_LARGURAS, SessaoPlanilha, escrever_aba, impressao_dados, larguras_automaticas
+from saidas import PASTA_SAIDAS, SaidasColunares
+
+def detectar_coluna_data_ssp(colunas):
+    """Coluna de data das SSPs (priorizar nomes comuns)."""
+    preferred_dates = ['Data Programada', 'Data de Abertura', 'Data de Abertura Saf', 'Data']
+    for p in preferred_dates:
+        if p in colunas:
+            return p
+    date_candidates = [c for c in colunas if 'data' in c.lower()]
+    return date_candidates[0] if date_candidates else None
 
 # Base padrão (caminho real onde estão os arquivos de entrada/saída)
 base = Path.home() / 'Downloads' / 'Documentos - Farol'
 
-# Tentar diferentes codificações para ler o arquivo. Procurar primeiro em `base`, depois no diretório atual.
-encodings = ['latin-1', 'iso-8859-1', 'cp1252', 'utf-8']
-csv_candidates = [base / 'SspCompleta.csv', Path('SspCompleta.csv')]
+# Motor de leitura do CSV: 'auto' (pyarrow quando instalado), 'pyarrow' ou 'c'
+motor_csv = 'auto'
 
-df = None
-for candidate in csv_candidates:
-    if not candidate.exists():
-        continue
-    for encoding in encodings:
-        try:
-            df = pd.read_csv(str(candidate), sep=';', encoding=encoding, low_memory=False)
-            break
-        except UnicodeDecodeError:
-            continue
-        except Exception:
-            continue
-    if df is not None:
-        break
-
-if df is None:
-    raise Exception("Não foi possível ler o arquivo SspCompleta.csv em nenhum dos locais esperados")
-
-# Verificar valores únicos na coluna de serviço para identificar o nome correto
-servico_col = None
-for col in df.columns:
-    if 'servi' in col.lower() or 'servi' in col.lower():
-        servico_col = col
-        break
-
-if not servico_col:
-    # Procurar por colunas que possam conter os serviços
-    for col in df.columns:
-        unique_vals = df[col].dropna().unique()
-        for val in unique_vals:
-            if isinstance(val, str) and ('MANUTEN' in val.upper() or 'PREVENTIVA' in val.upper()):
-                servico_col = col
-                break
-        if servico_col:
-            break
+# Saídas colunares ao lado da planilha (pasta 'saidas'): 'parquet', 'csv' e/ou 'arrow'; [] desliga
+formatos_saida = ['parquet']
 
-# Encontrar a coluna de veículo
-veiculo_col = None
-for col in df.columns:
-    if 'veiculo' in col.lower() or 'veículo' in col.lower():
-        veiculo_col = col
-        break
 
-if not veiculo_col:
-    # Tentar encontrar por padrão
-    for col in df.columns:
-        if any(term in col.upper() for term in ['VLT', 'TRAM', 'VEIC']):
-            veiculo_col = col
-            break
+# Procurar primeiro em `base`, depois no diretório atual. Codificação e separador
+# são detectados por amostra em `ler_csv_simg`, e o arquivo é lido uma única vez.
+csv_candidates = [base / 'SspCompleta.csv', Path('SspCompleta.csv')]
 
-if not servico_col or not veiculo_col:
-    raise Exception("Não foi possível identificar as colunas necessárias")
+# Cache dos papéis das colunas (serviço, veículo, data, status) por cabeçalho do CSV
+cache_colunas_path = base / 'ssp_colunas.json'
+MAX_CABECALHOS_CACHE = 20
 
-# Criar lista de todos os veículos de interesse
-todos_veiculos = []
-for grupo in grupos_veiculos.values():
-    todos_veiculos.extend(grupo[1])
 
-# Filtrar os dados
-filtro_veiculos = df[veiculo_col].isin(todos_veiculos)
+# Memo persistente das normalizações (texto original -> normalizado), com os mais recentes no fim
+cache_normalizacao_path = base / 'ssp_normalizacao.json'
+MAX_TEXTOS_NORMALIZADOS = 5000
+
 
 # Vamos normalizar os nomes de serviço e mapear apenas os que são
 # efetivamente "manutenção preventiva diária" ou "manutenção preventiva semanal".
@@ -93,45 +57,226 @@ def normalize_text(s):
     s = re.sub(r'\s+', ' ', s).strip()
     return s
 
-# Mapear valores originais para rótulos canônicos (somente DIÁRIA/SEMANAL)
-canonical_map = {}
-for serv in df[servico_col].dropna().unique():
-    n = normalize_text(serv)
-    # requer que seja manutenção e preventiva
-    if 'MANUTEN' in n and 'PREVENT' in n:
-        if 'DIARIA' in n:
-            canonical_map[serv] = 'MANUTENÇÃO PREVENTIVA DIÁRIA'
-        elif 'SEMANAL' in n:
-            canonical_map[serv] = 'MANUTENÇÃO PREVENTIVA SEMANAL'
-
-servicos_encontrados = list(canonical_map.keys())
-
-if not servicos_encontrados:
-    for serv in df[servico_col].dropna().unique():
-        n = normalize_text(serv)
-        if ('DIARIA' in n or 'SEMANAL' in n) and ('PREVENT' in n or 'MANUTEN' in n):
-            canonical = 'MANUTENÇÃO PREVENTIVA DIÁRIA' if 'DIARIA' in n else 'MANUTENÇÃO PREVENTIVA SEMANAL'
-            canonical_map[serv] = canonical
-            servicos_encontrados.append(serv)
-
-# Criar coluna canônica e aplicar filtro apenas nessas manutenções
-df['__servico_canonico'] = df[servico_col].map(canonical_map)
-filtro_servicos = df['__servico_canonico'].notna()
-
-# Aplicar filtros
-df_filtrado = df[filtro_veiculos & filtro_servicos].copy()
-
-# Substituir a coluna original de serviço pelos valores normalizados (canônicos)
-df_filtrado[servico_col] = df_filtrado['__servico_canonico']
-if '__servico_canonico' in df_filtrado.columns:
-    df_filtrado = df_filtrado.drop(columns=['__servico_canonico'])
-
-if len(df_filtrado) == 0:
-    # nenhum registro encontrado — sair silenciosamente
-    raise SystemExit(0)
-else:
+
+def _tabela_combinantes(textos: pd.Series) -> Dict[int, None]:
+    """Tabela de `str.translate` que remove os caracteres combinantes (acentos após NFKD) presentes em `textos`."""
+    return {ord(ch): None for ch in set(''.join(textos)) if unicodedata.combining(ch)}
+
+
+def normalizar_textos(valores, memo_path: Optional[Path] = None) -> pd.Series:
+    """Normaliza (como `normalize_text`) uma Series de textos, tratando cada valor distinto uma única vez.
+
+    A Series é convertida em categórica: apenas as categorias são
+    normalizadas, em operações vetorizadas do `.str`, e o resultado volta às
+    linhas pelos códigos. Os valores já vistos vêm de um memo em JSON mantido
+    entre execuções, em ordem de uso: os valores desta chamada vão para o fim
+    e, acima de MAX_TEXTOS_NORMALIZADOS, saem os usados há mais tempo. O
+    arquivo só é regravado quando há valores novos ou a ordem de uso mudou.
+    Valores ausentes permanecem NaN.
+    """
+    memo_path = memo_path or cache_normalizacao_path
+    serie = pd.Series(valores)
+    categorica = serie.astype('category')
+    categorias = pd.Series(categorica.cat.categories.astype(str), dtype=object)
+
+    memo = {}
+    try:
+        if memo_path.exists():
+            memo = json.loads(memo_path.read_text(encoding='utf-8'))
+    except Exception as e:
+        print(f"Aviso: memo de normalização inválido ({e}); normalizando novamente.")
+        memo = {}
+
+    normalizados = categorias.map(memo).astype(object)
+    novos = normalizados.isna()
+    # valores usados já são os mais recentes do memo (mesma ordem): nada a regravar
+    recentes = len(categorias) == 0 or list(memo)[-len(categorias):] == categorias.tolist()
+    if novos.any():
+        texto = categorias[novos].str.upper().str.normalize('NFKD')
+        texto = (texto.str.translate(_tabela_combinantes(texto))
+                 .str.replace(r'\s+', ' ', regex=True).str.strip())
+        normalizados[novos] = texto
+
+    if novos.any() or not recentes:
+        # reinserir os valores usados no fim do memo (ordem de uso) e descartar os mais antigos
+        for original, normalizado in zip(categorias, normalizados):
+            memo.pop(original, None)
+            memo[original] = normalizado
+        memo = dict(list(memo.items())[-MAX_TEXTOS_NORMALIZADOS:])
+        try:
+            tmp = memo_path.with_name(memo_path.name + '.tmp')
+            tmp.write_text(json.dumps(memo, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp, memo_path)
+        except Exception as e:
+            # memo é apenas otimização: falha ao gravar não interrompe a análise
+            print(f"Aviso: não foi possível gravar memo de normalização: {e}")
+
+    codigos = categorica.cat.codes.to_numpy()
+    return pd.Series(np.append(normalizados.to_numpy(dtype=object), np.nan)[codigos], index=serie.index, dtype=object)
+
+
+def carregar_ssp(motor: Optional[str] = None) -> pd.DataFrame:
+    """Lê SspCompleta.csv com a data já convertida (reaproveitando o cache colunar ao lado do CSV)."""
+    ssp_path = next((c for c in csv_candidates if c.exists()), None)
+    if ssp_path is None:
+        raise Exception("Arquivo SspCompleta.csv não encontrado em nenhum dos locais esperados")
+
+    df, _ = ler_csv_simg(ssp_path, detectar_data=detectar_coluna_data_ssp, dtype=None, motor=motor or motor_csv)
+    return df
+
+
+def identificar_colunas(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """Detecta as colunas de serviço, veículo, data e status (pelo nome e, se preciso, pelos valores)."""
+    # Verificar valores únicos na coluna de serviço para identificar o nome correto
+    servico_col = None
+    for col in df.columns:
+        if 'servi' in col.lower() or 'servi' in col.lower():
+            servico_col = col
+            break
+
+    if not servico_col:
+        # Procurar por colunas que possam conter os serviços
+        for col in df.columns:
+            unique_vals = df[col].dropna().unique()
+            for val in unique_vals:
+                if isinstance(val, str) and ('MANUTEN' in val.upper() or 'PREVENTIVA' in val.upper()):
+                    servico_col = col
+                    break
+            if servico_col:
+                break
+
+    # Encontrar a coluna de veículo
+    veiculo_col = None
+    for col in df.columns:
+        if 'veiculo' in col.lower() or 'veículo' in col.lower():
+            veiculo_col = col
+            break
+
+    if not veiculo_col:
+        # Tentar encontrar por padrão
+        for col in df.columns:
+            if any(term in col.upper() for term in ['VLT', 'TRAM', 'VEIC']):
+                veiculo_col = col
+                break
+
+    # detectar colunas de data (priorizar nomes comuns)
+    date_col = detectar_coluna_data_ssp(df.columns)
+
+    # detectar coluna de status
+    status_col = None
+    for c in df.columns:
+        lc = c.lower()
+        if lc == 'status' or 'status' in lc or lc == 'nome status':
+            status_col = c
+            break
+
+    return {'servico': servico_col, 'veiculo': veiculo_col, 'data': date_col, 'status': status_col}
+
+
+def impressao_cabecalho(colunas) -> str:
+    """Impressão digital (sha256) do cabeçalho do CSV: nomes e ordem das colunas."""
+    return hashlib.sha256('\x1f'.join(str(c) for c in colunas).encode('utf-8')).hexdigest()
+
+
+def resolver_colunas(df: pd.DataFrame, cache_path: Optional[Path] = None) -> Dict[str, Optional[str]]:
+    """Papéis das colunas, reaproveitados do cache enquanto o cabeçalho do CSV não mudar.
+
+    O cache (JSON) guarda os papéis por impressão digital do cabeçalho; um
+    cabeçalho novo dispara a detecção completa (`identificar_colunas`).
+    Detecções sem serviço ou veículo não são guardadas.
+    """
+    cache_path = cache_path or cache_colunas_path
+    impressao = impressao_cabecalho(df.columns)
+
+    cache = {}
+    try:
+        if cache_path.exists():
+            cache = json.loads(cache_path.read_text(encoding='utf-8'))
+    except Exception as e:
+        print(f"Aviso: cache de colunas SSP inválido ({e}); detectando novamente.")
+        cache = {}
+
+    papeis = cache.get(impressao)
+    if papeis and all(c is None or c in df.columns for c in papeis.values()):
+        return papeis
+
+    papeis = identificar_colunas(df)
+    if papeis['servico'] and papeis['veiculo']:
+        cache.pop(impressao, None)
+        cache[impressao] = papeis
+        # manter apenas os cabeçalhos mais recentes
+        cache = dict(list(cache.items())[-MAX_CABECALHOS_CACHE:])
+        try:
+            tmp = cache_path.with_name(cache_path.name + '.tmp')
+            tmp.write_text(json.dumps(cache, ensure_ascii=False, indent=1), encoding='utf-8')
+            os.replace(tmp, cache_path)
+        except Exception as e:
+            # cache é apenas otimização: falha ao gravar não interrompe a análise
+            print(f"Aviso: não foi possível gravar cache de colunas SSP: {e}")
+    return papeis
+
+
+def analisar_ssp(df: pd.DataFrame, cache_colunas: Optional[Path] = None) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Conta as manutenções preventivas diárias/semanais por veículo.
+
+    Retorna (resumo, detalhes) ou None se nenhum registro for encontrado.
+    `cache_colunas` substitui o arquivo padrão do cache de papéis das colunas.
+    """
+    # Papéis das colunas (serviço, veículo, data, status), do cache quando o cabeçalho já é conhecido
+    papeis = resolver_colunas(df, cache_colunas)
+    servico_col, veiculo_col = papeis['servico'], papeis['veiculo']
+    date_col, status_col = papeis['data'], papeis['status']
+
+    if not servico_col or not veiculo_col:
+        raise Exception("Não foi possível identificar as colunas necessárias")
+
+    # Serviços e veículos distintos passam juntos pela normalização (uma única leitura/gravação do memo);
+    # cada valor é decidido uma vez e o resultado volta às linhas pelos códigos
+    servicos = df[servico_col].astype('category')
+    veiculos_cat = df[veiculo_col].astype('category')
+    normalizados = normalizar_textos(pd.concat([pd.Series(servicos.cat.categories, dtype=object),
+                                                pd.Series(veiculos_cat.cat.categories, dtype=object)], ignore_index=True))
+    n = normalizados.iloc[:len(servicos.cat.categories)].reset_index(drop=True)
+
+    # Veículos de interesse (cadastro da frota em `frota.py`), comparados já normalizados
+    # e levados ao código do cadastro (ex.: 'vlt01 ' conta como 'VLT01')
+    canonicos = {normalize_text(v): v for v in frota.VEICULOS}
+    veiculos_canonicos = normalizados.iloc[len(servicos.cat.categories):].map(canonicos).to_numpy(dtype=object)
+    veiculo_canonico = pd.Series(np.append(veiculos_canonicos, np.nan)[veiculos_cat.cat.codes.to_numpy()],
+                                 index=df.index, dtype=object)
+    filtro_veiculos = veiculo_canonico.notna()
+
+    # Mapear valores originais para rótulos canônicos (somente DIÁRIA/SEMANAL)
+    manutencao = n.str.contains('MANUTEN', regex=False)
+    preventiva = n.str.contains('PREVENT', regex=False)
+    diaria = n.str.contains('DIARIA', regex=False)
+    semanal = n.str.contains('SEMANAL', regex=False)
+
+    # requer que seja manutenção e preventiva; senão, aceitar qualquer um dos dois termos
+    selecionados = manutencao & preventiva & (diaria | semanal)
+    if not selecionados.any():
+        selecionados = (diaria | semanal) & (preventiva | manutencao)
+    rotulos = np.where(diaria, 'MANUTENÇÃO PREVENTIVA DIÁRIA', 'MANUTENÇÃO PREVENTIVA SEMANAL').astype(object)
+    rotulos[~selecionados.to_numpy()] = np.nan
+
+    # Criar coluna canônica e aplicar filtro apenas nessas manutenções
+    # (série à parte, sem alterar o DataFrame recebido, que pode ser compartilhado)
+    servico_canonico = pd.Series(np.append(rotulos, np.nan)[servicos.cat.codes.to_numpy()], index=df.index, dtype=object)
+    filtro_servicos = servico_canonico.notna()
+
+    # Aplicar filtros (apenas as colunas necessárias são extraídas, sem copiar o DataFrame inteiro)
+    filtro = filtro_veiculos & filtro_servicos
+    if not filtro.any():
+        # nenhum registro encontrado
+        return None
+
+    # Veículo + serviço já normalizado (canônico)
+    veiculos = veiculo_canonico[filtro].rename(veiculo_col)
+    servicos_filtrados = servico_canonico[filtro].rename(servico_col)
+
     # Contar manutenções por veículo e tipo de serviço (usar a coluna do serviço já normalizada)
-    resultado = df_filtrado.groupby([veiculo_col, servico_col]).size().reset_index(name='Quantidade')
+    resultado = pd.DataFrame({veiculo_col: veiculos, servico_col: servicos_filtrados}).groupby(
+        [veiculo_col, servico_col]).size().reset_index(name='Quantidade')
 
     # Pivotar a tabela para ter serviços como colunas
     resultado_pivot = resultado.pivot_table(
@@ -140,150 +285,104 @@ else:
         values='Quantidade',
         fill_value=0
     ).reset_index()
-    
+
     # Renomear colunas para facilitar
     resultado_pivot.columns.name = None
-    
+
     # Garantir que temos as colunas desejadas
     colunas_desejadas = ['MANUTENÇÃO PREVENTIVA DIÁRIA', 'MANUTENÇÃO PREVENTIVA SEMANAL']
     for coluna in colunas_desejadas:
         if coluna not in resultado_pivot.columns:
             resultado_pivot[coluna] = 0
-    
+
     # Reordenar colunas
     colunas_finais = [veiculo_col] + colunas_desejadas
     for col in resultado_pivot.columns:
         if col not in colunas_finais and any(term in str(col).upper() for term in ['MANUTEN', 'PREVENTIVA']):
             colunas_finais.append(col)
-    
+
     resultado_final = resultado_pivot[colunas_finais]
-    
+
     # Adicionar linha de totais
     total_row = resultado_final.sum(numeric_only=True)
     total_row[veiculo_col] = 'TOTAL'
     resultado_final = pd.concat([resultado_final, pd.DataFrame([total_row])], ignore_index=True)
-    
-    # Salvar em `contagem_safs.xlsx` — adicionar duas abas e aplicar formatação similar a `mining_combined.py`
-    # Caminho fixo para o arquivo de saída conforme solicitado
-    contagem_path = base / 'dados_resumo.xlsx'
-
-    def write_df_to_sheet(wb, df_out, sheet_name):
-        if sheet_name in wb.sheetnames:
-            # remove existing sheet to replace
-            std = wb[sheet_name]
-            wb.remove(std)
-        ws = wb.create_sheet(sheet_name)
-
-        # write dataframe rows
-        rows = dataframe_to_rows(df_out, index=False, header=True)
-        header = next(rows)
-
-        # Header formatting
-        header_font = Font(bold=True, color='FFFFFF')
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_align = Alignment(horizontal='center')
-
-        for col_idx, col_name in enumerate(header, 1):
-            cell = ws.cell(row=1, column=col_idx, value=col_name)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_align
-
-        # write remaining rows
-        for r_idx, row in enumerate(rows, 2):
-            for c_idx, value in enumerate(row, 1):
-                ws.cell(row=r_idx, column=c_idx, value=value)
-
-        # adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if cell.value is not None and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Aplicar larguras específicas pedidas pelo usuário
-        try:
-            if sheet_name == 'Resumo Manutenções SSP':
-                ws.column_dimensions['B'].width = 34
-                ws.column_dimensions['C'].width = 34
-            elif sheet_name == 'Detalhes Manutenções SSP':
-                ws.column_dimensions['B'].width = 34
-        except Exception:
-            pass
-
-        # Habilitar AutoFilter somente para a aba de detalhes (segunda aba)
-        try:
-            if sheet_name == 'Detalhes Manutenções SSP':
-                last_col = get_column_letter(ws.max_column)
-                last_row = ws.max_row
-                ws.auto_filter.ref = f"A1:{last_col}{last_row}"
-        except Exception:
-            pass
-
-        ws.freeze_panes = 'A2'
-
 
     # preparar dataframes para escrita
     resumo_df = resultado_final.copy()
 
     # Detalhes: manter veículo + serviço normalizado e preservar colunas úteis (data da ordem e status), se existirem
-    colunas_detalhes = [veiculo_col, servico_col]
-
-    # detectar colunas de data (priorizar nomes comuns)
-    date_candidates = [c for c in df_filtrado.columns if 'data' in c.lower()]
-    preferred_dates = ['Data Programada', 'Data de Abertura', 'Data de Abertura Saf', 'Data']
-    date_col = None
-    for p in preferred_dates:
-        if p in df_filtrado.columns:
-            date_col = p
-            break
-    if date_col is None and date_candidates:
-        date_col = date_candidates[0]
-
-    # detectar coluna de status
-    status_col = None
-    for c in df_filtrado.columns:
-        lc = c.lower()
-        if lc == 'status' or 'status' in lc or lc == 'nome status':
-            status_col = c
-            break
+    # (a data fica tipada; o formato dd/mm/YYYY é aplicado só na escrita, em `write_df_to_sheet`)
+    detalhes = {veiculo_col: veiculos, servico_col: servicos_filtrados}
+
+    if date_col and date_col not in detalhes:
+        datas = df.loc[filtro, date_col]
+        if not pd.api.types.is_datetime64_any_dtype(datas):
+            datas = pd.to_datetime(datas, dayfirst=True, errors='coerce')
+        detalhes[date_col] = datas
+    if status_col and status_col not in detalhes:
+        detalhes[status_col] = df.loc[filtro, status_col]
+
+    detalhes_df = pd.DataFrame(detalhes, copy=False)
+
+    return resumo_df, detalhes_df
+
+
+def write_df_to_sheet(wb, df_out, sheet_name, sessao: Optional[SessaoPlanilha] = None):
+    # larguras: ajuste automático pelo conteúdo (vetorizado, amostrado em abas muito longas),
+    # depois as específicas pedidas pelo usuário (a partir da coluna B)
+    larguras = larguras_automaticas(df_out, amostra=AMOSTRA_LARGURAS)
+    especificas = {'Resumo Manutenções SSP': [34, 34], 'Detalhes Manutenções SSP': [34]}.get(sheet_name, [])
+    larguras = larguras[:1] + especificas + larguras[1 + len(especificas):]
+
+    # datas formatadas durante a escrita; AutoFilter somente na aba de detalhes.
+    # Com `sessao`, as linhas vão em fluxo direto para o arquivo no save
+    autofiltro = sheet_name == 'Detalhes Manutenções SSP'
+    if sessao is not None:
+        sessao.escrever_em_fluxo(sheet_name, df_out, larguras=larguras, autofiltro=autofiltro)
+    else:
+        escrever_aba(wb, sheet_name, df_out, larguras=larguras, autofiltro=autofiltro)
+
+
+def salvar_ssp(resumo_df: pd.DataFrame, detalhes_df: pd.DataFrame, contagem_path: Path,
+               sessao: Optional[SessaoPlanilha] = None, saidas: Optional[SaidasColunares] = None) -> None:
+    """Grava as abas de resumo e detalhes em `contagem_path` (ou na `sessao` da execução), criando o arquivo se preciso.
+
+    Com `saidas`, resumo e detalhes também vão para os formatos colunares ('ssp_resumo', 'ssp_detalhes'),
+    gravados só depois que a planilha da sessão foi salva com sucesso.
+    """
+    alteradas = 0
+    with SessaoPlanilha.usar(sessao, contagem_path, contagem_path) as sessao:
+        if saidas is not None:
+            sessao.ao_salvar(functools.partial(saidas.gravar, 'ssp_resumo', resumo_df))
+            sessao.ao_salvar(functools.partial(saidas.gravar, 'ssp_detalhes', detalhes_df))
+        # o resumo é curto e fica no workbook; os detalhes vão em fluxo
+        for df_out, sheet_name, fluxo in [(resumo_df, 'Resumo Manutenções SSP', None),
+                                          (detalhes_df, 'Detalhes Manutenções SSP', sessao)]:
+            alteradas += sessao.renderizar(sheet_name, impressao_dados(df_out),
+                                           lambda wb, df_out=df_out, sheet_name=sheet_name, fluxo=fluxo:
+                                           write_df_to_sheet(wb, df_out, sheet_name, fluxo))
 
-    if date_col and date_col not in colunas_detalhes:
-        colunas_detalhes.append(date_col)
-    if status_col and status_col not in colunas_detalhes:
-        colunas_detalhes.append(status_col)
+    # Mensagem de confirmação simples
+    if alteradas:
+        print(f"Abas SSP atualizadas: {contagem_path}")
 
-    detalhes_df = df_filtrado[colunas_detalhes].copy()
 
-    # formatar data para dd/mm/YYYY quando possível
-    if date_col and date_col in detalhes_df.columns:
-        try:
-            detalhes_df[date_col] = pd.to_datetime(detalhes_df[date_col], dayfirst=True, errors='coerce').dt.strftime('%d/%m/%Y')
-        except Exception:
-            pass
+def main(df: Optional[pd.DataFrame] = None) -> int:
+    """Executa a contagem SSP; `df` permite reaproveitar um SspCompleta.csv já lido."""
+    if df is None:
+        df = carregar_ssp()
 
-    # load or create workbook no caminho fixo
-    if contagem_path.exists():
-        wb = load_workbook(contagem_path)
-    else:
-        # garantir que a pasta exista
-        try:
-            contagem_path.parent.mkdir(parents=True, exist_ok=True)
-        except Exception:
-            pass
-        wb = Workbook()
+    resultado = analisar_ssp(df)
+    if resultado is None:
+        # nenhum registro encontrado — sair silenciosamente
+        return 0
 
-    write_df_to_sheet(wb, resumo_df, 'Resumo Manutenções SSP')
-    write_df_to_sheet(wb, detalhes_df, 'Detalhes Manutenções SSP')
+    resumo_df, detalhes_df = resultado
+    # Caminho fixo para o arquivo de saída conforme solicitado
+    salvar_ssp(resumo_df, detalhes_df, base / 'dados_resumo.xlsx', saidas=SaidasColunares(base / PASTA_SAIDAS, formatos_saida))
+    return 0
 
-    # save workbook
-    wb.save(contagem_path)
 
-    # Mensagem de confirmação simples
-    print(f"Arquivo salvo/atualizado: {contagem_path}")
\ No newline at end of file
+if __name__ == '__main__':
+    raise SystemExit(main())
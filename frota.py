@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Cadastro único da frota, na ordem das abas do Farol. Para incluir um veículo
+# basta acrescentá-lo aqui; analisadores e scripts auxiliares usam as tabelas
+# derivadas abaixo.
+#   grupo: valor da coluna 'Grupo' nas exportações do SIMG
+#   veiculos: códigos da coluna 'Veiculo' (None = todo o grupo pertence à linha)
+#   outros_codigos: códigos que também identificam a linha na coluna 'Veiculo'
+#   nome: nome usado na aba 'Falhas'
+#   nome_planilha / coluna_inicial: cabeçalho e primeira coluna (A) nas abas diárias
+LINHAS = {
+    'sul': {
+        'grupo': 'MATERIAL RODANTE - TUE', 'veiculos': None, 'outros_codigos': ['TUE'],
+        'nome': 'Linha Sul', 'nome_planilha': 'TUE', 'coluna_inicial': 'B',
+    },
+    'oeste': {
+        'grupo': 'MATERIAL RODANTE - VLT', 'veiculos': ['VLT01', 'VLT02', 'VLT03', 'VLT04', 'VLT05', 'VLT06'],
+        'outros_codigos': [], 'nome': 'Linha Oeste', 'nome_planilha': 'OESTE', 'coluna_inicial': 'F',
+    },
+    'nordeste': {
+        'grupo': 'MATERIAL RODANTE - VLT', 'veiculos': ['VLT07', 'VLT08', 'VLT09', 'VLT10', 'VLT11', 'VLT12', 'VLT13'],
+        'outros_codigos': [], 'nome': 'Linha Parangaba - Mucuripe', 'nome_planilha': 'NORDESTE', 'coluna_inicial': 'J',
+    },
+    'sobral': {
+        'grupo': 'MATERIAL RODANTE - VLT', 'veiculos': ['VLTS02', 'VLTS03', 'VLTS04', 'VLTS05', 'VLTS06'],
+        'outros_codigos': [], 'nome': 'Linha Sobral', 'nome_planilha': 'SOBRAL', 'coluna_inicial': 'N',
+    },
+    'cariri': {
+        'grupo': 'MATERIAL RODANTE - VLT', 'veiculos': ['TRAM1', 'TRAM2', 'VLTC03'],
+        'outros_codigos': [], 'nome': 'Linha Cariri', 'nome_planilha': 'CARIRI', 'coluna_inicial': 'R',
+    },
+}
+
+# Linha usada quando o veículo não pertence a nenhuma linha cadastrada (aba 'Falhas')
+OUTRA_LINHA = 'Outra Linha'
+
+
+def _compilar():
+    veiculo_linha: Dict[str, str] = {}
+    grupo_linha: Dict[str, str] = {}
+    veiculos: List[str] = []
+    for linha, info in LINHAS.items():
+        if info['veiculos'] is None:
+            grupo_linha.setdefault(info['grupo'], linha)
+        for veiculo in (info['veiculos'] or []) + info['outros_codigos']:
+            # a primeira linha que cita o veículo prevalece
+            veiculo_linha.setdefault(veiculo, linha)
+        veiculos.extend(info['veiculos'] or [])
+    return veiculo_linha, grupo_linha, veiculos
+
+
+# Tabelas de consulta pré-calculadas (dicionários: consulta O(1))
+VEICULO_LINHA, GRUPO_LINHA, VEICULOS = _compilar()
+LINHA_GRUPO = {linha: info['grupo'] for linha, info in LINHAS.items()}
+LINHA_NOME = {linha: info['nome'] for linha, info in LINHAS.items()}
+LINHA_PLANILHA = {linha: info['nome_planilha'] for linha, info in LINHAS.items()}
+LINHA_COLUNA = {linha: info['coluna_inicial'] for linha, info in LINHAS.items()}
+GRUPOS = sorted(set(LINHA_GRUPO.values()))
+
+# Códigos categóricos das linhas (na ordem de LINHAS)
+TIPO_LINHA = pd.CategoricalDtype(list(LINHAS))
+
+
+def linhas_config() -> Dict[str, Tuple[str, Optional[list]]]:
+    """Linha -> (grupo, veículos), no formato usado pelos analisadores diários."""
+    return {linha: (info['grupo'], list(info['veiculos']) if info['veiculos'] else None)
+            for linha, info in LINHAS.items()}
+
+
+def linhas_por_nome() -> Dict[str, List[str]]:
+    """Nome da linha ('Linha Oeste'...) -> códigos de veículo, no formato da aba 'Falhas'."""
+    return {info['nome']: (info['veiculos'] or []) + info['outros_codigos'] for info in LINHAS.values()}
+
+
+def identificar_linha(veiculo: str, grupo: str, exigir_grupo: bool = True) -> Optional[str]:
+    """Linha de um registro (chave de LINHAS) ou None; ver `classificar`."""
+    linha = GRUPO_LINHA.get(grupo)
+    if linha is not None:
+        return linha
+    linha = VEICULO_LINHA.get(veiculo)
+    if linha is not None and exigir_grupo and LINHA_GRUPO[linha] != grupo:
+        return None
+    return linha
+
+
+def classificar(df: pd.DataFrame, exigir_grupo: bool = True,
+                coluna_grupo: str = 'Grupo', coluna_veiculo: str = 'Veiculo') -> pd.Series:
+    """Linha de cada registro como categórica (NaN quando não pertence a nenhuma).
+
+    Grupos inteiros (ex.: TUE -> 'sul') têm precedência; nos demais o veículo
+    decide, via um único `map` sobre a tabela VEICULO_LINHA. Com
+    `exigir_grupo`, o grupo do registro precisa ser o da linha do veículo
+    (regra dos filtros por linha); sem ele vale apenas o veículo (regra da
+    aba 'Falhas').
+    """
+    if coluna_veiculo in df.columns:
+        linha = df[coluna_veiculo].astype(object).map(VEICULO_LINHA)
+    else:
+        linha = pd.Series(None, index=df.index, dtype=object)
+
+    if coluna_grupo in df.columns:
+        grupo = df[coluna_grupo].astype(object)
+        if exigir_grupo:
+            linha = linha.where(grupo == linha.map(LINHA_GRUPO))
+        linha = grupo.map(GRUPO_LINHA).fillna(linha)
+    elif exigir_grupo:
+        linha = pd.Series(None, index=df.index, dtype=object)
+
+    return linha.astype(TIPO_LINHA)
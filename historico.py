@@ -0,0 +1,183 @@
+import datetime
+import json
+import pathlib
+import re
+import sqlite3
+import unicodedata
+from typing import Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ingestao import ExportacaoSIMG, ler_csv_simg, parse_date_input
+
+# Padrão de nomes da coluna com o número do formulário (ex.: 'Número Saf', 'Nº OSM', 'Cod Saf')
+_PADRAO_NUMERO = re.compile(r'^(n[o°º]?|num|numero|cod|codigo)\b')
+
+
+def _normalizar_nome(col: str) -> str:
+    s = unicodedata.normalize('NFKD', str(col).strip().lower())
+    return ''.join(ch for ch in s if not unicodedata.combining(ch)).replace('.', ' ')
+
+
+def detectar_coluna_numero(colunas: Sequence[str], tipo: str, estrito: bool = False) -> Optional[str]:
+    """Coluna com o número do formulário; prioriza a que cita o tipo ('saf', 'osm'...).
+
+    Com `estrito`, só aceita uma coluna que cite o tipo (ex.: o número da SAF
+    dentro da exportação de OSMs).
+    """
+    candidatas = [c for c in colunas if _PADRAO_NUMERO.match(_normalizar_nome(c))]
+    for c in candidatas:
+        if tipo.lower() in _normalizar_nome(c):
+            return c
+    if estrito:
+        return None
+    return candidatas[0] if candidatas else None
+
+
+class HistoricoSIMG:
+    """Histórico local (SQLite) de SAFs/OSMs, alimentado de forma incremental.
+
+    Cada exportação ingerida é tratada como um delta sobre o histórico: a
+    chave é o número do formulário, linhas já vistas e sem alteração são
+    ignoradas e linhas alteradas (ex.: SAF que passou a 'Encerrada') são
+    atualizadas. Depois disso qualquer período pode ser consultado sem baixar
+    ou reprocessar os meses anteriores.
+
+    Os registros ficam em uma tabela por tipo ('saf', 'osm', ...) com o número,
+    a data de abertura (texto ISO, indexada) e a linha completa em JSON, já que
+    as colunas das exportações variam entre relatórios.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = pathlib.Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> 'HistoricoSIMG':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _tabela(tipo: str) -> str:
+        if not re.fullmatch(r'[a-z]+', tipo):
+            raise ValueError(f"Tipo de relatório inválido: {tipo!r}")
+        return f"registros_{tipo}"
+
+    def _garantir_tabela(self, tipo: str) -> str:
+        tabela = self._tabela(tipo)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {tabela} ("
+            " numero TEXT PRIMARY KEY,"
+            " data TEXT,"
+            " coluna_data TEXT,"
+            " hash TEXT NOT NULL,"
+            " dados TEXT NOT NULL,"
+            " atualizado_em TEXT NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_data ON {tabela} (data)")
+        return tabela
+
+    def ingerir(self, df: pd.DataFrame, tipo: str, date_col: str, chave: Optional[str] = None) -> Dict[str, int]:
+        """Incorpora uma exportação ao histórico e retorna contagens de novos/atualizados/ignorados."""
+        chave = chave or detectar_coluna_numero(df.columns, tipo)
+        if chave is None or chave not in df.columns:
+            raise ValueError(f"Coluna com o número do formulário não encontrada para '{tipo}'; informe `chave`.")
+
+        df = df.dropna(subset=[chave]).drop_duplicates(subset=[chave], keep='last')
+        numeros = df[chave].astype(str).str.strip()
+        hashes = pd.util.hash_pandas_object(df.astype(str), index=False).astype(str)
+
+        tabela = self._garantir_tabela(tipo)
+        existentes = dict(self._conn.execute(f"SELECT numero, hash FROM {tabela}").fetchall())
+        conhecidos = numeros.map(existentes)
+        novos = conhecidos.isna()
+        alterados = ~novos & (conhecidos != hashes)
+        mudou = (novos | alterados).to_numpy()
+
+        contagens = {'novos': int(novos.sum()), 'atualizados': int(alterados.sum()),
+                     'ignorados': int(len(df) - mudou.sum())}
+        if not mudou.any():
+            print(f"Histórico ({tipo}): nenhum registro novo ou alterado.")
+            return contagens
+
+        delta = df[mudou]
+        datas = delta[date_col].dt.strftime('%Y-%m-%d %H:%M:%S').where(delta[date_col].notna(), None)
+        # um JSON por linha: dividir a saída em `lines=True` quebraria textos com U+0085/U+2028 (latin-1)
+        linhas = [json.dumps(registro, ensure_ascii=False) for registro in
+                  json.loads(delta.to_json(orient='records', date_format='iso', force_ascii=False))]
+        if len(linhas) != len(delta):
+            raise ValueError(f"Histórico ({tipo}): {len(linhas)} registros serializados para {len(delta)} linhas")
+        agora = datetime.datetime.now().isoformat(timespec='seconds')
+
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO {tabela} (numero, data, coluna_data, hash, dados, atualizado_em)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(numero) DO UPDATE SET data = excluded.data, coluna_data = excluded.coluna_data,"
+                " hash = excluded.hash, dados = excluded.dados, atualizado_em = excluded.atualizado_em",
+                zip(numeros[mudou], datas, [date_col] * len(delta), hashes[mudou], linhas, [agora] * len(delta)),
+            )
+
+        print(f"Histórico ({tipo}): {contagens['novos']} novos, {contagens['atualizados']} atualizados, "
+              f"{contagens['ignorados']} já conhecidos.")
+        return contagens
+
+    def ingerir_csv(self, file_path: str, tipo: str, chave: Optional[str] = None) -> Dict[str, int]:
+        """Lê uma exportação (via `ler_csv_simg`, com cache) e a incorpora ao histórico."""
+        df, date_col = ler_csv_simg(file_path)
+        if date_col is None:
+            raise ValueError('Coluna de data não encontrada no arquivo')
+        return self.ingerir(df, tipo, date_col, chave=chave)
+
+    def _consultar(self, tipo: str, min_date: Optional[str], max_date: Optional[str]) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        tabela = self._tabela(tipo)
+        existe = self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone()
+        if not existe:
+            return None, None
+
+        sql = f"SELECT dados, coluna_data FROM {tabela} WHERE data IS NOT NULL"
+        params = []
+        min_dt = parse_date_input(min_date)
+        max_dt = parse_date_input(max_date)
+        if min_dt is not None:
+            sql += " AND data >= ?"
+            params.append(min_dt.strftime('%Y-%m-%d %H:%M:%S'))
+        if max_dt is not None:
+            sql += " AND data <= ?"
+            params.append(max_dt.strftime('%Y-%m-%d %H:%M:%S'))
+        sql += " ORDER BY data, numero"
+
+        linhas = self._conn.execute(sql, params).fetchall()
+        if not linhas:
+            return pd.DataFrame(), None
+
+        df = pd.DataFrame.from_records([json.loads(dados) for dados, _ in linhas])
+        date_col = linhas[0][1]
+        df[date_col] = pd.to_datetime(df[date_col], format='ISO8601')
+        return df, date_col
+
+    def consultar(self, tipo: str, min_date: Optional[str] = None, max_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Registros do tipo no período (datas no formato aceito por `parse_date_input`).
+
+        Retorna None se o tipo ainda não tiver sido ingerido.
+        """
+        return self._consultar(tipo, min_date, max_date)[0]
+
+    def exportacao(self, tipo: str, min_date: Optional[str] = None, max_date: Optional[str] = None,
+                   **kwargs) -> Optional[ExportacaoSIMG]:
+        """`ExportacaoSIMG` do período montada a partir do histórico, pronta para os analisadores.
+
+        Argumentos extras (`categorias`, `filtros`...) são repassados à
+        `ExportacaoSIMG`. Retorna None se não houver registros no período.
+        """
+        df, date_col = self._consultar(tipo, min_date, max_date)
+        if df is None or df.empty:
+            print(f"Histórico ({tipo}): nenhum registro no período informado.")
+            return None
+        return ExportacaoSIMG(f"{self.db_path.name}:{tipo}", min_date=min_date, max_date=max_date,
+                              dados=(df, date_col), **kwargs)
@@ -0,0 +1,574 @@
+import csv
+import datetime
+import codecs
+import concurrent.futures
+import hashlib
+import json
+import os
+import pathlib
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (necessário para ler/gravar Parquet)
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+    pq = None
+
+# Grupos relevantes para as análises de material rodante
+GRUPOS_PERMITIDOS = ['MATERIAL RODANTE - TUE', 'MATERIAL RODANTE - VLT']
+
+# Motor de leitura dos CSVs: 'auto' usa o leitor multithread do pyarrow quando instalado,
+# 'pyarrow' exige o pyarrow e 'c' força o motor padrão do pandas
+MOTOR_CSV = 'auto'
+
+# Formatos de data usados pelo SIMG, do mais para o menos específico
+FORMATOS_DATA_SIMG = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y')
+
+# Nomes alternativos de colunas entre exportações (nome usado nos analisadores -> nomes aceitos)
+ALIASES_COLUNAS = {
+    'Veiculo': ('Veiculo', 'Veículo'),
+}
+
+
+def parse_date_input(date_in: Optional[str]) -> Optional[pd.Timestamp]:
+    """Converte datas informadas pelo usuário ('01-10-2025', '01/10/2025' ou '01102025')."""
+    if not date_in:
+        return None
+    for fmt in ("%d-%m-%Y", "%d/%m/%Y", "%d%m%Y"):
+        try:
+            return pd.to_datetime(datetime.datetime.strptime(date_in, fmt))
+        except Exception:
+            continue
+    # fallback para tentativa genérica
+    try:
+        return pd.to_datetime(date_in, dayfirst=True, errors='coerce')
+    except Exception:
+        return None
+
+
+def detectar_coluna_data(colunas) -> Optional[str]:
+    """Retorna a coluna de data de abertura (Data de Abertura Saf / Data de Abertura)."""
+    if 'Data de Abertura Saf' in colunas:
+        return 'Data de Abertura Saf'
+    if 'Data de Abertura' in colunas:
+        return 'Data de Abertura'
+    # pega a primeira coluna que contenha 'Data' no nome
+    found = [c for c in colunas if 'Data' in c]
+    return found[0] if found else None
+
+
+def detectar_formato(file_path, tamanho_amostra: int = 64 * 1024) -> Tuple[str, str]:
+    """Detecta codificação e separador a partir de uma amostra limitada do início do arquivo.
+
+    Mesma ideia do antigo uso de `chardet` (ler só uma amostra), mas sem
+    dependência extra: amostras só com ASCII ficam em latin-1 (o padrão do
+    SIMG e que aceita qualquer byte), UTF-8 só é escolhido quando há bytes
+    não-ASCII válidos em UTF-8 e cp1252 quando aparecem caracteres da faixa
+    0x80-0x9F (aspas/travessões do Windows).
+    """
+    with open(file_path, 'rb') as f:
+        amostra = f.read(tamanho_amostra)
+
+    if amostra.startswith(b'\xef\xbb\xbf'):
+        encoding = 'utf-8-sig'
+    elif amostra.isascii():
+        encoding = 'latin-1'
+    else:
+        try:
+            # final=False tolera um caractere multibyte cortado no fim da amostra
+            codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'latin-1'
+            if any(0x80 <= b <= 0x9f for b in amostra):
+                try:
+                    amostra.decode('cp1252')
+                    encoding = 'cp1252'
+                except UnicodeDecodeError:
+                    pass
+
+    texto = amostra.decode(encoding, errors='replace')
+    linhas = texto.splitlines()
+    if len(amostra) == tamanho_amostra and len(linhas) > 1:
+        # descartar a última linha, possivelmente incompleta
+        linhas = linhas[:-1]
+    cabecalho = linhas[0] if linhas else ''
+    try:
+        sep = csv.Sniffer().sniff('\n'.join(linhas[:20]), delimiters=';,\t|').delimiter
+    except csv.Error:
+        contagens = {d: cabecalho.count(d) for d in (';', ',', '\t', '|')}
+        sep = max(contagens, key=contagens.get) if any(contagens.values()) else ';'
+    return encoding, sep
+
+
+def converter_datas_simg(serie: pd.Series, formatos: Sequence[str] = FORMATOS_DATA_SIMG) -> pd.Series:
+    """Converte datas do SIMG para datetime usando formatos explícitos.
+
+    Cada texto distinto é convertido uma única vez (as datas se repetem muito
+    nas exportações) e o resultado é espalhado de volta pelos códigos de
+    `pd.factorize`. Textos que não seguem nenhum formato de `formatos` caem no
+    caminho antigo (`pd.to_datetime(dayfirst=True)`); o que ainda falhar vira NaT.
+    """
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(unicos, dtype=object).str.strip()
+
+    convertidos = pd.Series(pd.NaT, index=unicos.index, dtype='datetime64[ns]')
+    pendentes = unicos.notna()
+    for fmt in formatos:
+        if not pendentes.any():
+            break
+        convertidos[pendentes] = pd.to_datetime(unicos[pendentes], format=fmt, errors='coerce')
+        pendentes = convertidos.isna() & unicos.notna()
+
+    if pendentes.any():
+        convertidos[pendentes] = pd.to_datetime(unicos[pendentes], dayfirst=True, errors='coerce')
+
+    # código -1 (valor ausente) aponta para o NaT acrescentado no fim
+    valores = np.append(convertidos.to_numpy(), np.datetime64('NaT', 'ns'))
+    return pd.Series(valores[codigos], index=serie.index, name=serie.name)
+
+
+def resolver_projecao(cabecalho: Sequence[str], colunas: Sequence[str],
+                      detectar_data: Callable[[Sequence[str]], Optional[str]]) -> List[str]:
+    """Traduz as colunas pedidas (e a coluna de data) para os nomes reais do cabeçalho.
+
+    Os nomes do arquivo podem ter espaços sobrando e aliases (ver `ALIASES_COLUNAS`);
+    colunas ausentes são ignoradas, como nos analisadores.
+    """
+    nomes = {c.strip(): c for c in cabecalho}
+    usecols = []
+    date_col = detectar_data(list(nomes))
+    if date_col is not None:
+        usecols.append(nomes[date_col])
+    for col in colunas:
+        for alias in ALIASES_COLUNAS.get(col, (col,)):
+            if alias in nomes:
+                if nomes[alias] not in usecols:
+                    usecols.append(nomes[alias])
+                break
+    return usecols
+
+
+def categorizar(df: pd.DataFrame, categorias: Dict[str, Sequence[str]]) -> pd.DataFrame:
+    """Converte colunas de baixa cardinalidade em categóricas com um conjunto fixo de categorias.
+
+    As categorias conhecidas (configuração da frota, níveis, status, agentes)
+    estão sempre presentes; valores inesperados no arquivo são acrescentados
+    para não virarem NaN. A ordem é alfabética para que ordenações sobre as
+    colunas categóricas continuem iguais às das colunas de texto.
+    """
+    for col, conhecidas in categorias.items():
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        observadas = df[col].dropna().unique()
+        cats = sorted(set(conhecidas).union(observadas))
+        df[col] = pd.Categorical(df[col], categories=cats)
+    return df
+
+
+# Versão do formato do cache; incrementar quando a tipagem aplicada na leitura mudar
+VERSAO_CACHE = 2
+
+
+def _hash_arquivo(path: pathlib.Path, bloco: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(bloco), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CacheColunar:
+    """Cache em Parquet do DataFrame já lido e tipado, gravado ao lado do CSV.
+
+    A entrada é válida enquanto tamanho e mtime do CSV não mudarem; se apenas o
+    mtime mudar (ex.: mesmo relatório baixado de novo) o hash do conteúdo decide.
+    Entradas desatualizadas ou corrompidas são simplesmente reconstruídas.
+    `sufixo` separa outros derivados do mesmo CSV (ex.: o cubo de `cubo.py`).
+    """
+
+    def __init__(self, csv_path: pathlib.Path, opcoes: str, sufixo: str = 'cache'):
+        self.csv_path = csv_path
+        self.opcoes = opcoes
+        self.dados_path = csv_path.with_name(f"{csv_path.name}.{sufixo}.parquet")
+        self.meta_path = csv_path.with_name(f"{csv_path.name}.{sufixo}.json")
+
+    @staticmethod
+    def disponivel() -> bool:
+        return pyarrow is not None
+
+    def _assinatura(self) -> Dict[str, object]:
+        stat = self.csv_path.stat()
+        return {'tamanho': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def carregar(self, colunas: Optional[Sequence[str]] = None,
+                 detectar_data: Callable[[Sequence[str]], Optional[str]] = None) -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame em cache ou None se a entrada não for válida.
+
+        Com `colunas`, a entrada serve se tiver sido gravada com todas as
+        colunas ou com um superconjunto delas; só as pedidas são lidas do Parquet.
+        """
+        if not self.disponivel() or not self.meta_path.exists() or not self.dados_path.exists():
+            return None
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding='utf-8'))
+            if meta.get('versao') != VERSAO_CACHE or meta.get('opcoes') != self.opcoes:
+                return None
+            if meta.get('colunas') is not None and (colunas is None or not set(colunas) <= set(meta['colunas'])):
+                return None
+
+            atual = self._assinatura()
+            if meta.get('tamanho') != atual['tamanho']:
+                return None
+            if meta.get('mtime_ns') != atual['mtime_ns']:
+                # mesmo tamanho mas arquivo tocado: confirmar pelo conteúdo
+                if meta.get('sha256') != _hash_arquivo(self.csv_path):
+                    return None
+                meta.update(atual)
+                self._gravar_meta(meta)
+
+            if colunas is None:
+                return pd.read_parquet(self.dados_path)
+            esquema = pq.read_schema(self.dados_path).names
+            return pd.read_parquet(self.dados_path, columns=resolver_projecao(esquema, colunas, detectar_data))
+        except Exception as e:
+            print(f"Aviso: cache de {self.csv_path.name} inválido ({e}); reconstruindo.")
+            return None
+
+    def salvar(self, df: pd.DataFrame, colunas: Optional[Sequence[str]] = None) -> None:
+        if not self.disponivel():
+            return
+        try:
+            tmp = self.dados_path.with_name(self.dados_path.name + '.tmp')
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, self.dados_path)
+            meta = {
+                'versao': VERSAO_CACHE,
+                'opcoes': self.opcoes,
+                'colunas': sorted(colunas) if colunas is not None else None,
+                'sha256': _hash_arquivo(self.csv_path),
+            }
+            meta.update(self._assinatura())
+            self._gravar_meta(meta)
+        except Exception as e:
+            # cache é apenas otimização: falha ao gravar não interrompe a análise
+            print(f"Aviso: não foi possível gravar cache de {self.csv_path.name}: {e}")
+
+    def _gravar_meta(self, meta: Dict[str, object]) -> None:
+        tmp = self.meta_path.with_name(self.meta_path.name + '.tmp')
+        tmp.write_text(json.dumps(meta), encoding='utf-8')
+        os.replace(tmp, self.meta_path)
+
+
+def _preparar_leitura(path: pathlib.Path, encoding: Optional[str], sep: Optional[str],
+                      colunas: Optional[Sequence[str]],
+                      detectar_data: Callable[[Sequence[str]], Optional[str]]) -> Tuple[str, str, Optional[List[str]]]:
+    """Resolve codificação, separador e projeção de colunas antes de ler o CSV."""
+    if encoding is None or sep is None:
+        encoding_detectado, sep_detectado = detectar_formato(path)
+        encoding = encoding or encoding_detectado
+        sep = sep or sep_detectado
+
+    usecols = None
+    if colunas is not None:
+        cabecalho = pd.read_csv(path, encoding=encoding, sep=sep, nrows=0).columns
+        usecols = resolver_projecao(cabecalho, colunas, detectar_data)
+    return encoding, sep, usecols
+
+
+def _resolver_motor(motor: Optional[str]) -> str:
+    motor = motor or MOTOR_CSV
+    if motor == 'auto':
+        return 'pyarrow' if pyarrow is not None else 'c'
+    if motor not in ('pyarrow', 'c'):
+        raise ValueError(f"Motor de leitura desconhecido: {motor}")
+    if motor == 'pyarrow' and pyarrow is None:
+        raise ValueError("Motor 'pyarrow' solicitado, mas o pacote pyarrow não está instalado")
+    return motor
+
+
+def _ler_csv(path: pathlib.Path, encoding: str, sep: str, dtype, usecols: Optional[List[str]], motor: str) -> pd.DataFrame:
+    """Lê o CSV inteiro com o motor escolhido.
+
+    O leitor do pyarrow não aceita quebras de linha dentro de campos entre
+    aspas (comuns em campos de texto livre); nesse caso a leitura é refeita
+    com o motor C, que reporta erros reais normalmente. O pandas repassa o
+    erro do pyarrow como `ParserError`, por isso os dois tipos são tratados.
+    """
+    if motor == 'pyarrow':
+        try:
+            return pd.read_csv(path, encoding=encoding, sep=sep, dtype=dtype, usecols=usecols, engine='pyarrow')
+        except (pyarrow.lib.ArrowInvalid, pd.errors.ParserError) as e:
+            print(f"Aviso: leitor pyarrow falhou em {path.name} ({e}); usando o motor C.")
+    return pd.read_csv(path, encoding=encoding, sep=sep, dtype=dtype, usecols=usecols, low_memory=False)
+
+
+def _tipar(df: pd.DataFrame, detectar_data: Callable[[Sequence[str]], Optional[str]]) -> Optional[str]:
+    """Normaliza os nomes de colunas e converte a coluna de data; retorna o nome dela."""
+    # Normalizar nomes de colunas (remover espaços redundantes)
+    df.columns = [col.strip() for col in df.columns]
+
+    date_col = detectar_data(df.columns)
+    if date_col is not None:
+        df[date_col] = converter_datas_simg(df[date_col])
+    return date_col
+
+
+def ler_csv_simg(file_path, detectar_data: Callable[[Sequence[str]], Optional[str]] = None,
+                 encoding: Optional[str] = None, sep: Optional[str] = None, dtype=str,
+                 colunas: Optional[Sequence[str]] = None, motor: Optional[str] = None,
+                 usar_cache: bool = True) -> Tuple[pd.DataFrame, Optional[str]]:
+    """Lê um CSV exportado pelo SIMG e converte a coluna de data para datetime.
+
+    Retorna o DataFrame (sem nenhum filtro aplicado) e o nome da coluna de data
+    encontrada por `detectar_data` (padrão: `detectar_coluna_data`). Codificação
+    e separador não informados são detectados por `detectar_formato`, e o
+    arquivo é lido uma única vez. Com `colunas`, apenas essas colunas (mais a
+    de data) são lidas do CSV; aliases são resolvidos por `resolver_projecao`.
+    `motor` escolhe o leitor (ver `MOTOR_CSV`). Com `usar_cache`, o resultado
+    é reaproveitado entre execuções via `CacheColunar`.
+    """
+    path = pathlib.Path(file_path)
+    detectar_data = detectar_data or detectar_coluna_data
+
+    cache = None
+    if usar_cache:
+        opcoes = f"{detectar_data.__name__}|{encoding or 'auto'}|{sep or 'auto'}|{dtype.__name__ if dtype else 'auto'}"
+        cache = CacheColunar(path, opcoes)
+        df = cache.carregar(colunas, detectar_data)
+        if df is not None:
+            print(f"Cache reaproveitado para {path.name} ({len(df)} registros).")
+            return df, detectar_data(df.columns)
+
+    encoding, sep, usecols = _preparar_leitura(path, encoding, sep, colunas, detectar_data)
+    df = _ler_csv(path, encoding, sep, dtype, usecols, _resolver_motor(motor))
+    date_col = _tipar(df, detectar_data)
+
+    if cache is not None:
+        cache.salvar(df, colunas)
+    return df, date_col
+
+
+def ler_csv_simg_em_blocos(file_path, tamanho_bloco: int,
+                           detectar_data: Callable[[Sequence[str]], Optional[str]] = None,
+                           encoding: Optional[str] = None, sep: Optional[str] = None, dtype=str,
+                           colunas: Optional[Sequence[str]] = None) -> Iterator[Tuple[pd.DataFrame, Optional[str]]]:
+    """Versão em blocos de `ler_csv_simg`: gera (bloco já tipado, coluna de data).
+
+    Não usa o cache colunar e sempre usa o motor C (o leitor do pyarrow não
+    lê em blocos); serve para exportações grandes em que só uma
+    pequena parte das linhas interessa (ver `ExportacaoSIMG`).
+    """
+    path = pathlib.Path(file_path)
+    detectar_data = detectar_data or detectar_coluna_data
+
+    encoding, sep, usecols = _preparar_leitura(path, encoding, sep, colunas, detectar_data)
+    leitor = pd.read_csv(path, encoding=encoding, sep=sep, dtype=dtype, usecols=usecols, chunksize=tamanho_bloco)
+    with leitor:
+        for bloco in leitor:
+            yield bloco, _tipar(bloco, detectar_data)
+
+
+def _ler_tarefa(kwargs: Dict[str, object]) -> Tuple[pd.DataFrame, Optional[str]]:
+    # Executado em um processo filho; precisa ser de nível de módulo para ser serializável
+    return ler_csv_simg(**kwargs)
+
+
+def ler_em_paralelo(tarefas: Dict[str, Dict[str, object]],
+                    max_workers: Optional[int] = None) -> Dict[str, Tuple[pd.DataFrame, Optional[str]]]:
+    """Lê várias exportações ao mesmo tempo, uma por processo.
+
+    `tarefas` mapeia um nome ('saf', 'osm', ...) para os argumentos de
+    `ler_csv_simg` (`file_path`, `colunas`, `detectar_data`...); o resultado
+    mapeia o mesmo nome para (DataFrame tipado, coluna de data). Como cada
+    arquivo é lido em um processo próprio, o tempo total fica próximo ao do
+    maior arquivo. `detectar_data` deve ser uma função de nível de módulo. Se
+    o pool não puder ser criado, as leituras são feitas em sequência.
+    """
+    if len(tarefas) <= 1:
+        return {nome: ler_csv_simg(**kwargs) for nome, kwargs in tarefas.items()}
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers or len(tarefas)) as pool:
+            futuros = {nome: pool.submit(_ler_tarefa, kwargs) for nome, kwargs in tarefas.items()}
+            return {nome: futuro.result() for nome, futuro in futuros.items()}
+    except (OSError, NotImplementedError, concurrent.futures.BrokenExecutor) as e:
+        print(f"Aviso: leitura paralela indisponível ({e}); lendo as exportações em sequência.")
+        return {nome: ler_csv_simg(**kwargs) for nome, kwargs in tarefas.items()}
+
+
+def _padronizar_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    """Garante nomes de colunas consistentes entre exportações (Veículo -> Veiculo)."""
+    if 'Veículo' in df.columns and 'Veiculo' not in df.columns:
+        df = df.rename(columns={'Veículo': 'Veiculo'})
+    return df
+
+
+class ExportacaoSIMG:
+    """Exportação do SIMG (SAF/OSM) lida uma única vez e compartilhada entre analisadores.
+
+    A leitura passa pelo cache colunar (`ler_csv_simg`). O DataFrame base já
+    vem com a data convertida, filtrado pelo intervalo de datas e pelos grupos
+    de material rodante. Cada analisador aplica sobre ele apenas os seus
+    próprios filtros. `colunas` limita a leitura às colunas de que os
+    analisadores precisam (None lê todas) e `categorias` indica as colunas
+    convertidas em categóricas (ver `categorizar`).
+
+    `filtros` recebe um predicado por analisador (coluna -> valores aceitos);
+    uma linha é mantida se atender a qualquer um deles, e um predicado vazio
+    desliga esse filtro. Com `tamanho_bloco`, o CSV é lido em blocos e todos os
+    filtros são aplicados a cada bloco, de modo que a memória acompanha o
+    resultado e não o tamanho da exportação; o resultado (linhas e categorias,
+    tomadas de todo o arquivo antes dos filtros) é o mesmo da leitura
+    completa. `motor` escolhe o leitor da leitura completa (ver `MOTOR_CSV`).
+
+    `dados` recebe um par (DataFrame, coluna de data) já carregado, por
+    exemplo do histórico local (`historico.HistoricoSIMG`), no lugar do CSV;
+    os mesmos filtros são aplicados.
+    """
+
+    def __init__(self, file_path: str, min_date: Optional[str] = None, max_date: Optional[str] = None,
+                 colunas: Optional[Sequence[str]] = None, categorias: Optional[Dict[str, Sequence[str]]] = None,
+                 filtros: Optional[List[Dict[str, Sequence[str]]]] = None, tamanho_bloco: Optional[int] = None,
+                 motor: Optional[str] = None, dados: Optional[Tuple[pd.DataFrame, str]] = None):
+        self.path = pathlib.Path(file_path)
+        self._min_date_input = min_date
+        self._max_date_input = max_date
+        self.colunas = list(colunas) if colunas is not None else None
+        self.categorias = categorias or {}
+        self.filtros = list(filtros) if filtros is not None else None
+        self.tamanho_bloco = tamanho_bloco
+        self.motor = motor
+        self._dados = dados
+        self.date_col: Optional[str] = None
+        self.df = self._load_data()
+
+    def _filtrar(self, df: pd.DataFrame, date_col: str, contagens: Dict[str, List[int]]) -> pd.DataFrame:
+        """Aplica data válida, intervalo de datas, grupo e predicados dos analisadores.
+
+        `contagens` acumula (antes, depois) de cada etapa para o resumo impresso.
+        """
+        df = df.dropna(subset=[date_col])
+
+        def _etapa(nome: str, antes: int, depois: int) -> None:
+            atual = contagens.setdefault(nome, [0, 0])
+            atual[0] += antes
+            atual[1] += depois
+
+        # Aplicar filtro por intervalo de datas se informado
+        if self._min_dt is not None or self._max_dt is not None:
+            before_dt = len(df)
+            if self._min_dt is not None:
+                df = df[df[date_col] >= self._min_dt]
+            if self._max_dt is not None:
+                df = df[df[date_col] <= self._max_dt]
+            _etapa('datas', before_dt, len(df))
+
+        # Filtrar apenas grupos relevantes (somente MATERIAL RODANTE - TUE e MATERIAL RODANTE - VLT)
+        if 'Grupo' in df.columns:
+            before = len(df)
+            df = df[df['Grupo'].isin(GRUPOS_PERMITIDOS)]
+            _etapa('grupo', before, len(df))
+
+        # Predicados dos analisadores (status, agente causador...), combinados com OU
+        if self.filtros and all(self.filtros):
+            before = len(df)
+            mascara = pd.Series(False, index=df.index)
+            for predicado in self.filtros:
+                parcial = pd.Series(True, index=df.index)
+                for col, valores in predicado.items():
+                    if col in df.columns:
+                        parcial &= df[col].isin(valores)
+                mascara |= parcial
+            df = df[mascara]
+            _etapa('predicados', before, len(df))
+
+        return df
+
+    def _load_data(self) -> pd.DataFrame:
+        try:
+            self._min_dt = parse_date_input(self._min_date_input)
+            self._max_dt = parse_date_input(self._max_date_input)
+            contagens: Dict[str, List[int]] = {}
+
+            if self.tamanho_bloco and self._dados is None:
+                blocos = []
+                date_col = None
+                # valores observados antes dos filtros, como na leitura completa (mesmas categorias)
+                observadas = {col: set() for col in self.categorias}
+                for bloco, date_col in ler_csv_simg_em_blocos(self.path, self.tamanho_bloco, colunas=self.colunas):
+                    if date_col is None:
+                        raise ValueError('Coluna de data não encontrada no arquivo')
+                    bloco = _padronizar_colunas(bloco)
+                    for col in observadas:
+                        if col in bloco.columns:
+                            observadas[col].update(bloco[col].dropna().unique())
+                    blocos.append(self._filtrar(bloco, date_col, contagens))
+                if date_col is None:
+                    raise ValueError('Coluna de data não encontrada no arquivo')
+                df = pd.concat(blocos)
+                # categorias depois da concatenação (blocos podem observar valores diferentes)
+                df = categorizar(df, {col: list(conhecidas) + list(observadas[col])
+                                      for col, conhecidas in self.categorias.items()})
+            else:
+                if self._dados is not None:
+                    df, date_col = self._dados
+                else:
+                    df, date_col = ler_csv_simg(self.path, colunas=self.colunas, motor=self.motor)
+                if date_col is None:
+                    raise ValueError('Coluna de data não encontrada no arquivo')
+                # Filtros por igualdade/isin passam a comparar códigos inteiros
+                df = categorizar(_padronizar_colunas(df), self.categorias)
+                df = self._filtrar(df, date_col, contagens)
+
+            if 'datas' in contagens:
+                print(f"Filtragem por intervalo de datas aplicada: {contagens['datas'][0]} -> {contagens['datas'][1]} registros mantidos.")
+            if 'grupo' in contagens:
+                print(f"Filtragem por Grupo aplicada: {contagens['grupo'][0]} -> {contagens['grupo'][1]} registros mantidos.")
+            else:
+                print("Aviso: coluna 'Grupo' não encontrada; nenhum filtro por Grupo aplicado.")
+            if 'predicados' in contagens:
+                antes, depois = contagens['predicados']
+                print(f"Filtragem por status/agente aplicada: {antes} -> {depois} registros mantidos.")
+
+            self.date_col = date_col
+            print(f"Exportação lida ({len(df)} registros) de: {self.path.name}")
+            return df
+        except Exception as e:
+            raise Exception(f"Erro ao carregar dados: {e}")
+
+
+# Bases já lidas nesta execução, indexadas por (arquivo, data mínima, data máxima)
+_bases: Dict[Tuple[str, Optional[str], Optional[str]], ExportacaoSIMG] = {}
+
+
+def carregar_exportacao(file_path: str, min_date: Optional[str] = None, max_date: Optional[str] = None,
+                        colunas: Optional[Sequence[str]] = None,
+                        categorias: Optional[Dict[str, Sequence[str]]] = None,
+                        filtros: Optional[List[Dict[str, Sequence[str]]]] = None,
+                        tamanho_bloco: Optional[int] = None, motor: Optional[str] = None) -> ExportacaoSIMG:
+    """Retorna a exportação já lida nesta execução ou lê o arquivo pela primeira vez.
+
+    Se a base existente não tiver todas as `colunas` pedidas, ou tiver sido
+    filtrada por predicados que não incluem os `filtros` pedidos, o arquivo é
+    relido com a união de colunas e predicados.
+    """
+    chave = (str(pathlib.Path(file_path).resolve()), min_date, max_date)
+    existente = _bases.get(chave)
+    if existente is not None:
+        cobre_colunas = existente.colunas is None or (colunas is not None and set(colunas) <= set(existente.colunas))
+        cobre_filtros = existente.filtros is None or (filtros is not None and all(p in existente.filtros for p in filtros))
+        if cobre_colunas and cobre_filtros:
+            return existente
+        colunas = None if colunas is None or existente.colunas is None else list(dict.fromkeys(existente.colunas + list(colunas)))
+        if filtros is not None and existente.filtros is not None:
+            filtros = existente.filtros + [p for p in filtros if p not in existente.filtros]
+        else:
+            filtros = None
+    _bases[chave] = ExportacaoSIMG(file_path, min_date=min_date, max_date=max_date, colunas=colunas,
+                                   categorias=categorias, filtros=filtros, tamanho_bloco=tamanho_bloco, motor=motor)
+    return _bases[chave]
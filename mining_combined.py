@@ -1,11 +1,49 @@
+import numpy as np
 import pandas as pd
 import datetime
+import functools
 import pathlib
-from typing import Dict, Tuple, Optional
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.utils import get_column_letter
+from typing import Dict, List, Tuple, Optional
+
+import frota
+from calendario import PERIODOS, ContagemCalendario
+from confiabilidade import IndicadoresConfiabilidade
+from cubo import CuboFalhas
+from historico import HistoricoSIMG
+from ingestao import ExportacaoSIMG, carregar_exportacao, parse_date_input
+from planilha import SessaoPlanilha, escrever_aba, impressao_dados
+from saidas import PASTA_SAIDAS, SaidasColunares
+
+# Agentes causadores que não caracterizam falha (aba 'Sem Falhas')
+AGENTES_SEM_FALHA = [
+    'NÃO CARACTERIZA FALHA',
+    'TERCEIROS',
+    'NÃO IDENTIFICADO',
+    'TÉRMINO DA VIDA ÚTIL',
+    'MANUTENÇÃO',
+    'INEXISTENTE',
+    'ERRO OPERACIONAL',
+    'ERRO NO PROCESSAMENTO',
+    'DEGRADAÇOES ADVINDAS DE CAUSAS EXTERNAS',
+    'ATUAÇÃO DE PROTEÇÃO'
+]
+
+
+def categorias_simg() -> Dict[str, list]:
+    """Conjunto de categorias conhecidas das colunas de baixa cardinalidade (a partir do cadastro da frota)."""
+    return {
+        'Grupo': list(frota.GRUPOS),
+        'Veiculo': list(frota.VEICULOS),
+        'Nível': ['A', 'B', 'C'],
+        'Nome Status': ['Encerrada'],
+        'Agente Causador': AGENTES_SEM_FALHA + ['FALHA DO EQUIPAMENTO'],
+    }
+
+
+def _codigos_ordenacao(serie: pd.Series) -> np.ndarray:
+    """Códigos inteiros na ordem de `sort_values` (categorias na ordem própria, ausentes por último)."""
+    codigos, valores = pd.factorize(serie, sort=True)
+    return np.where(codigos < 0, len(valores), codigos)
 
 
 class UnifiedSAFAnalyzer:
@@ -15,85 +53,47 @@ class UnifiedSAFAnalyzer:
     e aplica filtros específicos quando `sem_falhas=True`.
     """
 
-    def __init__(self, file_path: str, sem_falhas: bool = False, min_date: Optional[str] = None, max_date: Optional[str] = None):
+    # Colunas usadas pelo analisador (além da data); o restante do CSV não é lido
+    COLUNAS = ['Grupo', 'Veiculo', 'Nível', 'Nome Status', 'Agente Causador']
+
+    # Posição de cada linha nas abas diárias do Farol e o nome exibido no cabeçalho
+    MAPEAMENTO_LINHAS = {linha: {'coluna_inicial': frota.LINHA_COLUNA[linha], 'nome_planilha': frota.LINHA_PLANILHA[linha]}
+                         for linha in frota.LINHAS}
+
+    @staticmethod
+    def predicado(sem_falhas: bool) -> Dict[str, list]:
+        """Filtros de status/agente do analisador, aplicáveis já na leitura (vazio = sem filtro)."""
+        if not sem_falhas:
+            return {}
+        return {'Nome Status': ['Encerrada'], 'Agente Causador': AGENTES_SEM_FALHA}
+
+    def __init__(self, file_path: str, sem_falhas: bool = False, min_date: Optional[str] = None, max_date: Optional[str] = None,
+                 base: Optional[ExportacaoSIMG] = None, tamanho_bloco: Optional[int] = None,
+                 motor: Optional[str] = None, cubo: Optional[CuboFalhas] = None):
         self.path = pathlib.Path(file_path)
         self.sem_falhas = sem_falhas
         self._min_date_input = min_date
         self._max_date_input = max_date
+        if base is None:
+            base = carregar_exportacao(file_path, min_date=min_date, max_date=max_date,
+                                       colunas=self.COLUNAS, categorias=categorias_simg(),
+                                       filtros=[self.predicado(sem_falhas)], tamanho_bloco=tamanho_bloco, motor=motor)
+        self._base = base
         self.df = self._load_data()
         self.linhas_config = self._get_linhas_config()
         self.contadores = self._inicializar_contadores()
+        self.calendario: Optional[ContagemCalendario] = None
+        self.cubo = cubo
+        self._linha_registro: Optional[pd.Series] = None
 
     def _load_data(self) -> pd.DataFrame:
-        """Carrega CSV e normaliza nomes de colunas essenciais.
+        """Obtém a visão do analisador a partir da exportação compartilhada.
 
-        - Tenta reconhecer colunas: data (Data de Abertura / Data de Abertura Saf),
-          veículo (Veículo / Veiculo), grupo, nível, Nome Status e Agente Causador.
+        - A leitura, conversão de datas e filtros por período/grupo ficam em `ingestao.ExportacaoSIMG`.
         - Para `sem_falhas` aplica filtro de status 'Encerrada' e agentes não caracterizam falha.
         """
         try:
-            df = pd.read_csv(self.path, encoding="latin-1", sep=';', dtype=str)
-
-            # Normalizar nomes de colunas (remover espaços redundantes)
-            df.columns = [col.strip() for col in df.columns]
-
-            # Detectar coluna de data
-            if 'Data de Abertura Saf' in df.columns:
-                date_col = 'Data de Abertura Saf'
-            elif 'Data de Abertura' in df.columns:
-                date_col = 'Data de Abertura'
-            else:
-                # pega a primeira coluna que contenha 'Data' no nome
-                found = [c for c in df.columns if 'Data' in c]
-                date_col = found[0] if found else None
-
-            if date_col is None:
-                raise ValueError('Coluna de data não encontrada no arquivo')
-
-            # Converter data para datetime
-            df[date_col] = pd.to_datetime(df[date_col], dayfirst=True, errors='coerce')
-            df = df.dropna(subset=[date_col])
-
-            # Aplicar filtro por intervalo de datas se informado
-            def _parse_date_input(date_in: Optional[str]) -> Optional[pd.Timestamp]:
-                if not date_in:
-                    return None
-                for fmt in ("%d-%m-%Y", "%d/%m/%Y", "%d%m%Y"):
-                    try:
-                        return pd.to_datetime(datetime.datetime.strptime(date_in, fmt))
-                    except Exception:
-                        continue
-                # fallback para tentativa genérica
-                try:
-                    return pd.to_datetime(date_in, dayfirst=True, errors='coerce')
-                except Exception:
-                    return None
-
-            min_dt = _parse_date_input(self._min_date_input)
-            max_dt = _parse_date_input(self._max_date_input)
-
-            if min_dt is not None or max_dt is not None:
-                before_dt = len(df)
-                if min_dt is not None:
-                    df = df[df[date_col] >= min_dt]
-                if max_dt is not None:
-                    df = df[df[date_col] <= max_dt]
-                after_dt = len(df)
-                print(f"Filtragem por intervalo de datas aplicada: {before_dt} -> {after_dt} registros mantidos.")
-
-            # Filtrar apenas grupos relevantes (somente MATERIAL RODANTE - TUE e MATERIAL RODANTE - VLT)
-            grupos_permitidos = ['MATERIAL RODANTE - TUE', 'MATERIAL RODANTE - VLT']
-            if 'Grupo' in df.columns:
-                before = len(df)
-                df = df[df['Grupo'].isin(grupos_permitidos)]
-                after = len(df)
-                print(f"Filtragem por Grupo aplicada: {before} -> {after} registros mantidos.")
-            else:
-                print("Aviso: coluna 'Grupo' não encontrada; nenhum filtro por Grupo aplicado.")
-
-            # Garantir nomes de colunas consistentes
-            if 'Veículo' in df.columns and 'Veiculo' not in df.columns:
-                df = df.rename(columns={'Veículo': 'Veiculo'})
+            df = self._base.df
 
             # Filtrar SAFs encerradas e sem-falhas quando solicitado
             if self.sem_falhas:
@@ -101,24 +101,11 @@ class UnifiedSAFAnalyzer:
                 if 'Nome Status' in df.columns:
                     df = df[df['Nome Status'] == 'Encerrada']
 
-                agentes_sem_falha = [
-                    'NÃO CARACTERIZA FALHA',
-                    'TERCEIROS',
-                    'NÃO IDENTIFICADO',
-                    'TÉRMINO DA VIDA ÚTIL',
-                    'MANUTENÇÃO',
-                    'INEXISTENTE',
-                    'ERRO OPERACIONAL',
-                    'ERRO NO PROCESSAMENTO',
-                    'DEGRADAÇOES ADVINDAS DE CAUSAS EXTERNAS',
-                    'ATUAÇÃO DE PROTEÇÃO'
-                ]
-
                 if 'Agente Causador' in df.columns:
-                    df = df[df['Agente Causador'].isin(agentes_sem_falha)]
+                    df = df[df['Agente Causador'].isin(AGENTES_SEM_FALHA)]
 
             # Armazenar o nome efetivo da coluna de data para uso posterior
-            self._date_col = date_col
+            self._date_col = self._base.date_col
             print(f"Dados carregados ({len(df)} registros) de: {self.path.name}")
             return df
         except Exception as e:
@@ -126,13 +113,7 @@ class UnifiedSAFAnalyzer:
 
     @staticmethod
     def _get_linhas_config() -> Dict[str, Tuple[str, Optional[list]]]:
-        return {
-            'sul': ('MATERIAL RODANTE - TUE', None),
-            'oeste': ('MATERIAL RODANTE - VLT', ['VLT01', 'VLT02', 'VLT03', 'VLT04', 'VLT05', 'VLT06']),
-            'nordeste': ('MATERIAL RODANTE - VLT', ['VLT07', 'VLT08', 'VLT09', 'VLT10', 'VLT11', 'VLT12', 'VLT13']),
-            'sobral': ('MATERIAL RODANTE - VLT', ['VLTS02', 'VLTS03', 'VLTS04', 'VLTS05', 'VLTS06']),
-            'cariri': ('MATERIAL RODANTE - VLT', ['TRAM1', 'TRAM2', 'VLTC03'])
-        }
+        return frota.linhas_config()
 
     def _inicializar_contadores(self) -> Dict[str, pd.DataFrame]:
         dias = range(1, 32)
@@ -143,7 +124,7 @@ class UnifiedSAFAnalyzer:
             'C': pd.DataFrame(0, index=dias, columns=linhas)
         }
 
-    def filtrar_linha(self, linha: str) -> pd.DataFrame:
+    def _filtro_linha(self, linha: str) -> pd.Series:
         if linha not in self.linhas_config:
             raise ValueError(f"Linha '{linha}' não reconhecida")
 
@@ -151,15 +132,17 @@ class UnifiedSAFAnalyzer:
         if 'Grupo' not in self.df.columns:
             raise ValueError("Coluna 'Grupo' não encontrada no dataset")
 
-        filtro = self.df['Grupo'] == grupo
+        # algumas fontes usam 'Veiculo' ou outra coluna, assumimos 'Veiculo'
+        if veiculos and 'Veiculo' not in self.df.columns:
+            raise ValueError("Coluna 'Veiculo' não encontrada no dataset")
 
-        if veiculos:
-            # algumas fontes usam 'Veiculo' ou outra coluna, assumimos 'Veiculo'
-            if 'Veiculo' not in self.df.columns:
-                raise ValueError("Coluna 'Veiculo' não encontrada no dataset")
-            filtro = filtro & self.df['Veiculo'].isin(veiculos)
+        # todos os registros são classificados uma única vez pelo cadastro da frota
+        if self._linha_registro is None:
+            self._linha_registro = frota.classificar(self.df)
+        return self._linha_registro == linha
 
-        return self.df[filtro].copy()
+    def filtrar_linha(self, linha: str) -> pd.DataFrame:
+        return self.df[self._filtro_linha(linha)].copy()
 
     def _get_mes_ano_referencia(self, df_linha: pd.DataFrame) -> Tuple[int, int]:
         if df_linha.empty:
@@ -168,153 +151,195 @@ class UnifiedSAFAnalyzer:
         primeira_data = df_linha[self._date_col].iloc[0]
         return primeira_data.month, primeira_data.year
 
-    def processar_linha(self, linha: str) -> None:
-        print(f"Processando linha {linha.upper()} ({'sem_falhas' if self.sem_falhas else 'safs'})...")
-        df_linha = self.filtrar_linha(linha)
+    def _montar_calendario(self) -> ContagemCalendario:
+        """Conta (linha, dia, nível) sobre todo o intervalo pedido, mesmo que cubra vários meses.
 
-        if df_linha.empty:
-            print(f"Nenhum dado encontrado para a linha {linha}.")
-            return
+        Sem `min_date`/`max_date`, o intervalo vai da primeira à última data dos registros.
+        Com `cubo`, as contagens vêm de um `rollup` dele em vez dos registros.
+        """
+        datas = self.df[self._date_col]
+        agora = pd.Timestamp.now()
+        inicio = parse_date_input(self._min_date_input)
+        fim = parse_date_input(self._max_date_input)
+        if inicio is None:
+            inicio = datas.min() if not datas.empty else agora
+        if fim is None:
+            fim = datas.max() if not datas.empty else agora
+
+        calendario = ContagemCalendario(inicio, fim, list(self.linhas_config.keys()))
+        if 'Nível' not in self.df.columns:
+            return calendario
+
+        if self.cubo is not None:
+            # recorte do cubo já agregado, sem nova varredura dos registros
+            recorte = self.cubo.rollup(['Linha', 'Data', 'Nível'], self.predicado(self.sem_falhas))
+            for linha, parte in recorte.groupby('Linha', sort=False):
+                if linha in calendario.linhas:
+                    calendario.adicionar(linha, parte['Data'], parte['Nível'], parte['Quantidade'])
+            return calendario
+
+        for linha in calendario.linhas:
+            filtro = self._filtro_linha(linha)
+            calendario.adicionar(linha, datas[filtro], self.df.loc[filtro, 'Nível'])
+        return calendario
+
+    def _contar_niveis(self, linhas: List[str]) -> None:
+        """Preenche os contadores A/B/C das `linhas` a partir do calendário de contagens.
+
+        Cada linha usa como referência o mês/ano do seu primeiro registro
+        (`_get_mes_ano_referencia`); os demais meses ficam em `self.calendario`.
+        """
+        if self.calendario is None:
+            self.calendario = self._montar_calendario()
+        datas = self.df[self._date_col]
 
-        mes, ano = self._get_mes_ano_referencia(df_linha)
+        for linha in linhas:
+            print(f"Processando linha {linha.upper()} ({'sem_falhas' if self.sem_falhas else 'safs'})...")
+            filtro = self._filtro_linha(linha)
 
-        for dia in range(1, 32):
-            try:
-                mask_data = (
-                    (df_linha[self._date_col].dt.day == dia) &
-                    (df_linha[self._date_col].dt.month == mes) &
-                    (df_linha[self._date_col].dt.year == ano)
-                )
-
-                df_dia = df_linha[mask_data]
-                if df_dia.empty:
-                    continue
-
-                for nivel in ['A', 'B', 'C']:
-                    count = len(df_dia[df_dia.get('Nível') == nivel]) if 'Nível' in df_dia.columns else 0
-                    self.contadores[nivel].at[dia, linha] = count
-
-            except ValueError:
+            if not filtro.any():
+                print(f"Nenhum dado encontrado para a linha {linha}.")
                 continue
 
+            mes, ano = self._get_mes_ano_referencia(datas[filtro].to_frame())
+            grade = self.calendario.grade_mensal(linha, ano, mes)
+            for i, nivel in enumerate(self.calendario.niveis):
+                self.contadores[nivel][linha] = grade[:, i].astype('int64')
+
+    def processar_linha(self, linha: str) -> None:
+        self._contar_niveis([linha])
+
     def processar_todas_linhas(self) -> None:
-        for linha in self.linhas_config.keys():
-            self.processar_linha(linha)
+        self._contar_niveis(list(self.linhas_config.keys()))
+
+    def salvar_na_planilha_existente(self, template_path: str, output_path: str, sheet_name: Optional[str] = None,
+                                     sessao: Optional[SessaoPlanilha] = None, diferencial: bool = True) -> int:
+        """Preenche a grade diária do template e retorna quantas células mudaram.
 
-    def salvar_na_planilha_existente(self, template_path: str, output_path: str, sheet_name: Optional[str] = None) -> None:
+        No modo `diferencial` os contadores são comparados com os valores já
+        presentes na aba e só as células diferentes são escritas; a aba só
+        conta como alterada na sessão (e o arquivo só é regravado) se ao menos
+        uma célula mudou. Com `sessao`, a gravação fica para o fim da execução.
+        """
         try:
-            wb = load_workbook(template_path)
             if sheet_name is None:
                 sheet_name = 'Sem Falhas' if self.sem_falhas else "SAF's Diárias"
-
-            if sheet_name not in wb.sheetnames:
-                raise ValueError(f"Planilha '{sheet_name}' não encontrada no template")
-
-            ws = wb[sheet_name]
-
-            mapeamento_linhas = {
-                'sul': {'coluna_inicial': 'B', 'nome_planilha': 'TUE'},
-                'oeste': {'coluna_inicial': 'F', 'nome_planilha': 'OESTE'},
-                'nordeste': {'coluna_inicial': 'J', 'nome_planilha': 'NORDESTE'},
-                'sobral': {'coluna_inicial': 'N', 'nome_planilha': 'SOBRAL'},
-                'cariri': {'coluna_inicial': 'R', 'nome_planilha': 'CARIRI'}
-            }
-
-            # Preencher contadores
-            for linha_interna, info in mapeamento_linhas.items():
-                coluna_inicial = info['coluna_inicial']
-                for i, nivel in enumerate(['A', 'B', 'C']):
-                    coluna = chr(ord(coluna_inicial) + i)
-                    for dia in range(1, 32):
-                        linha_planilha = dia + 3
-                        valor = int(self.contadores[nivel].at[dia, linha_interna])
-                        ws[f'{coluna}{linha_planilha}'] = valor
-
-            # Cabeçalhos e dias
-            for linha_interna, info in mapeamento_linhas.items():
-                coluna_inicial = info['coluna_inicial']
-                nome_planilha = info['nome_planilha']
-                if not ws[f'{coluna_inicial}3'].value:
-                    ws[f'{coluna_inicial}3'] = nome_planilha
-                for i, nivel in enumerate(['A', 'B', 'C']):
-                    coluna = chr(ord(coluna_inicial) + i)
-                    if not ws[f'{coluna}3'].value:
-                        ws[f'{coluna}3'] = nivel
-
-            for dia in range(1, 32):
-                linha_planilha = dia + 3
-                if not ws[f'A{linha_planilha}'].value:
-                    ws[f'A{linha_planilha}'] = dia
-
-            wb.save(output_path)
-            print(f"Planilha preenchida com sucesso: {output_path} (aba: {sheet_name})")
+            with SessaoPlanilha.usar(sessao, template_path, output_path) as sessao:
+                if sheet_name not in sessao.wb.sheetnames:
+                    raise ValueError(f"Planilha '{sheet_name}' não encontrada no template")
+                alteradas = self._preencher_grade(sessao.wb[sheet_name], diferencial)
+                if alteradas:
+                    sessao.marcar_alterada(sheet_name)
+                    print(f"Planilha preenchida com sucesso: {output_path} (aba: {sheet_name}, {alteradas} células alteradas)")
+                else:
+                    print(f"Aba '{sheet_name}' sem alterações; nenhuma célula escrita.")
+            return alteradas
 
         except Exception as e:
             raise Exception(f"Erro ao preencher planilha: {e}")
 
+    def grade_diaria(self) -> pd.DataFrame:
+        """Grade diária tipada (uma linha por dia, colunas '<linha> <nível>'), como na aba, para as saídas colunares."""
+        colunas = {'Dia': pd.Series(self.contadores['A'].index, dtype='int64')}
+        for linha_interna, info in self.MAPEAMENTO_LINHAS.items():
+            for nivel in ['A', 'B', 'C']:
+                colunas[f"{info['nome_planilha']} {nivel}"] = self.contadores[nivel][linha_interna].to_numpy(dtype='int64')
+        return pd.DataFrame(colunas)
+
+    def _preencher_grade(self, ws, diferencial: bool = True) -> int:
+        alteradas = 0
+
+        def escrever(ref: str, valor, somente_vazia: bool = False) -> None:
+            nonlocal alteradas
+            atual = ws[ref].value
+            if somente_vazia and atual:
+                return
+            if atual != valor:
+                alteradas += 1
+            elif diferencial:
+                return
+            ws[ref] = valor
+
+        mapeamento_linhas = self.MAPEAMENTO_LINHAS
+
+        # Preencher contadores
+        for linha_interna, info in mapeamento_linhas.items():
+            coluna_inicial = info['coluna_inicial']
+            for i, nivel in enumerate(['A', 'B', 'C']):
+                coluna = chr(ord(coluna_inicial) + i)
+                contagem = self.contadores[nivel][linha_interna]
+                for dia in range(1, 32):
+                    linha_planilha = dia + 3
+                    escrever(f'{coluna}{linha_planilha}', int(contagem.at[dia]))
+
+        # Cabeçalhos e dias (apenas onde o template está vazio)
+        for linha_interna, info in mapeamento_linhas.items():
+            coluna_inicial = info['coluna_inicial']
+            nome_planilha = info['nome_planilha']
+            escrever(f'{coluna_inicial}3', nome_planilha, somente_vazia=True)
+            for i, nivel in enumerate(['A', 'B', 'C']):
+                coluna = chr(ord(coluna_inicial) + i)
+                escrever(f'{coluna}3', nivel, somente_vazia=True)
+
+        for dia in range(1, 32):
+            linha_planilha = dia + 3
+            escrever(f'A{linha_planilha}', dia, somente_vazia=True)
+
+        return alteradas
+
+    def salvar_consolidado(self, template_path: str, output_path: str, periodo: str = 'M',
+                           sheet_name: Optional[str] = None, sessao: Optional[SessaoPlanilha] = None) -> None:
+        """Grava os totais A/B/C de todo o intervalo por dia, semana ou mês (`periodo` 'D', 'W' ou 'M')."""
+        try:
+            if self.calendario is None:
+                self.calendario = self._montar_calendario()
+            nomes = {linha: info['nome_planilha'] for linha, info in self.MAPEAMENTO_LINHAS.items()}
+            tabela = self.calendario.tabela(periodo, nomes)
+
+            if sheet_name is None:
+                sheet_name = f"{'Sem Falhas' if self.sem_falhas else 'SAFs'} - {PERIODOS[periodo]}"
+
+            larguras = [26 if periodo == 'W' else 12, 12]
+            with SessaoPlanilha.usar(sessao, template_path, output_path) as sessao:
+                if sessao.renderizar(sheet_name, impressao_dados(tabela),
+                                     lambda wb: escrever_aba(wb, sheet_name, tabela, larguras=larguras, autofiltro=False)):
+                    print(f"Consolidado {PERIODOS[periodo].lower()} salvo: {output_path} (aba: {sheet_name})")
+
+        except Exception as e:
+            raise Exception(f"Erro ao salvar consolidado: {e}")
+
 
 class SAFComFalhasAnalyzer:
     """Classe para análise de SAFs com falhas do equipamento"""
 
-    def __init__(self, file_path: str, min_date: Optional[str] = None, max_date: Optional[str] = None):
+    # Colunas usadas pelo analisador (além da data); o restante do CSV não é lido
+    COLUNAS = ['Grupo', 'Veiculo', 'Nível', 'Nome Status', 'Agente Causador', 'Sistema', 'Sub Sistema']
+
+    # Filtros de status/agente do analisador, aplicáveis já na leitura
+    PREDICADO = {'Nome Status': ['Encerrada'], 'Agente Causador': ['FALHA DO EQUIPAMENTO']}
+
+    # Colunas da aba 'Falhas' (e da saída colunar 'falhas')
+    COLUNAS_ABA = ['Data', 'Veículo', 'Linha', 'Nível', 'Sistema', 'Sub Sistema', 'Agente Causador']
+
+    def __init__(self, file_path: str, min_date: Optional[str] = None, max_date: Optional[str] = None,
+                 base: Optional[ExportacaoSIMG] = None, tamanho_bloco: Optional[int] = None,
+                 motor: Optional[str] = None, cubo: Optional[CuboFalhas] = None):
         self.downloads_path = pathlib.Path(file_path)
         self._min_date_input = min_date
         self._max_date_input = max_date
+        if base is None:
+            base = carregar_exportacao(file_path, min_date=min_date, max_date=max_date,
+                                       colunas=self.COLUNAS, categorias=categorias_simg(),
+                                       filtros=[self.PREDICADO], tamanho_bloco=tamanho_bloco, motor=motor)
+        self._base = base
         self.df = self._load_data()
         self.linhas_config = self._get_linhas_config()
+        self.cubo = cubo
 
     def _load_data(self) -> pd.DataFrame:
         try:
-            df = pd.read_csv(
-                self.downloads_path,
-                encoding='latin-1',
-                sep=';',
-                dtype=str
-            )
-
-            df["Data de Abertura Saf"] = pd.to_datetime(
-                df["Data de Abertura Saf"],
-                dayfirst=True,
-                errors='coerce'
-            )
-
-            df = df.dropna(subset=["Data de Abertura Saf"])
-
-            # Aplicar filtro por intervalo de datas se informado
-            def _parse_date_input(date_in: Optional[str]) -> Optional[pd.Timestamp]:
-                if not date_in:
-                    return None
-                for fmt in ("%d-%m-%Y", "%d/%m/%Y", "%d%m%Y"):
-                    try:
-                        return pd.to_datetime(datetime.datetime.strptime(date_in, fmt))
-                    except Exception:
-                        continue
-                try:
-                    return pd.to_datetime(date_in, dayfirst=True, errors='coerce')
-                except Exception:
-                    return None
-
-            min_dt = _parse_date_input(self._min_date_input)
-            max_dt = _parse_date_input(self._max_date_input)
-
-            if min_dt is not None or max_dt is not None:
-                before_dt = len(df)
-                if min_dt is not None:
-                    df = df[df['Data de Abertura Saf'] >= min_dt]
-                if max_dt is not None:
-                    df = df[df['Data de Abertura Saf'] <= max_dt]
-                after_dt = len(df)
-                print(f"Filtragem por intervalo de datas aplicada (falhas): {before_dt} -> {after_dt} registros mantidos.")
-
-            # Filtrar apenas grupos relevantes (somente MATERIAL RODANTE - TUE e MATERIAL RODANTE - VLT)
-            grupos_permitidos = ['MATERIAL RODANTE - TUE', 'MATERIAL RODANTE - VLT']
-            if 'Grupo' in df.columns:
-                before = len(df)
-                df = df[df['Grupo'].isin(grupos_permitidos)]
-                after = len(df)
-                print(f"Filtragem por Grupo aplicada (falhas): {before} -> {after} registros mantidos.")
-            else:
-                print("Aviso: coluna 'Grupo' não encontrada no arquivo de falhas; nenhum filtro por Grupo aplicado.")
+            df = self._base.df
+            self._date_col = self._base.date_col
 
             df = df[df['Nome Status'] == 'Encerrada']
             df = df[df['Agente Causador'] == 'FALHA DO EQUIPAMENTO']
@@ -327,102 +352,191 @@ class SAFComFalhasAnalyzer:
 
     @staticmethod
     def _get_linhas_config() -> Dict[str, list]:
-        return {
-            'Linha Sul': ['TUE'],
-            'Linha Oeste': ['VLT01', 'VLT02', 'VLT03', 'VLT04', 'VLT05', 'VLT06'],
-            'Linha Parangaba - Mucuripe': ['VLT07', 'VLT08', 'VLT09', 'VLT10', 'VLT11', 'VLT12', 'VLT13'],
-            'Linha Sobral': ['VLTS02', 'VLTS03', 'VLTS04', 'VLTS05', 'VLTS06'],
-            'Linha Cariri': ['TRAM1', 'TRAM2', 'VLTC03']
-        }
+        return frota.linhas_por_nome()
 
     def identificar_linha(self, veiculo: str, grupo: str) -> str:
-        if grupo == 'MATERIAL RODANTE - TUE':
-            return 'Linha Sul'
-
-        for linha, veiculos in self.linhas_config.items():
-            if veiculo in veiculos:
-                return linha
-
-        return 'Outra Linha'
+        linha = frota.identificar_linha(veiculo, grupo, exigir_grupo=False)
+        return frota.LINHA_NOME[linha] if linha is not None else frota.OUTRA_LINHA
 
     def processar_falhas(self) -> pd.DataFrame:
-        print("Processando falhas do equipamento...")
+        """Monta a tabela de falhas ordenada por data, linha e nível.
 
-        falhas_detalhadas = []
+        A coluna 'Data' é mantida como datetime (dia, sem horário); a formatação
+        dd/mm/aaaa é feita apenas na escrita da planilha. A ordem é calculada
+        uma vez sobre as chaves tipadas (`np.lexsort`, estável como o
+        `sort_values`) e cada coluna é copiada uma única vez, já ordenada.
+        """
+        print("Processando falhas do equipamento...")
 
-        for _, row in self.df.iterrows():
-            linha = self.identificar_linha(row['Veiculo'], row['Grupo'])
+        df = self.df
+        datas = df[self._date_col].dt.normalize()
+        # mesma regra de `identificar_linha`, aplicada à coluna inteira
+        linha = frota.classificar(df, exigir_grupo=False).astype(object).map(frota.LINHA_NOME).fillna(frota.OUTRA_LINHA)
 
-            falha_info = {
-                'Data': row['Data de Abertura Saf'].strftime('%d/%m/%Y'),
-                'Veículo': row['Veiculo'],
-                'Linha': linha,
-                'Nível': row['Nível'],
-                'Sistema': row.get('Sistema'),
-                'Sub Sistema': row.get('Sub Sistema'),
-                'Agente Causador': row.get('Agente Causador')
-            }
+        ordem = np.lexsort([_codigos_ordenacao(df['Nível']), _codigos_ordenacao(linha), _codigos_ordenacao(datas)])
 
-            falhas_detalhadas.append(falha_info)
+        def _ordenada(serie: pd.Series) -> pd.Series:
+            return serie.take(ordem).reset_index(drop=True)
 
-        df_falhas = pd.DataFrame(falhas_detalhadas)
-        df_falhas['Data'] = pd.to_datetime(df_falhas['Data'], dayfirst=True)
-        df_falhas = df_falhas.sort_values(['Data', 'Linha', 'Nível'])
-        df_falhas['Data'] = df_falhas['Data'].dt.strftime('%d/%m/%Y')
+        colunas = {'Data': _ordenada(datas), 'Veículo': _ordenada(df['Veiculo']), 'Linha': _ordenada(linha),
+                   'Nível': _ordenada(df['Nível'])}
+        for col in ['Sistema', 'Sub Sistema', 'Agente Causador']:
+            colunas[col] = _ordenada(df[col]) if col in df.columns else None
+        df_falhas = pd.DataFrame(colunas, index=pd.RangeIndex(len(df)), copy=False)
 
         print(f"Processamento concluído. {len(df_falhas)} registros de falha organizados.")
         return df_falhas
 
-    def salvar_na_planilha_existente(self, df_falhas: pd.DataFrame, template_path: str, output_path: str) -> None:
+    def contar_falhas(self, dimensoes: List[str]) -> pd.DataFrame:
+        """Quantidade de falhas do equipamento por `dimensoes` do cubo (ex.: ['Veiculo', 'Sistema'])."""
+        if self.cubo is None:
+            self.cubo = CuboFalhas.construir(self.df, self._date_col)
+        return self.cubo.rollup(dimensoes, self.PREDICADO)
+
+    def falhas_por_veiculo(self) -> pd.DataFrame:
+        """Falhas por dia e veículo, com a linha no formato da aba 'Falhas' (recorte do cubo)."""
+        dimensoes = ['Data', 'Veiculo'] + (['Grupo'] if 'Grupo' in self.df.columns else [])
+        contagem = self.contar_falhas(dimensoes)
+        contagem['Linha'] = (frota.classificar(contagem, exigir_grupo=False).astype(object)
+                             .map(frota.LINHA_NOME).fillna(frota.OUTRA_LINHA))
+        return contagem
+
+    def atualizar_confiabilidade(self, indicadores: IndicadoresConfiabilidade) -> int:
+        """Incorpora as falhas do intervalo pedido aos indicadores (só os dias do intervalo são substituídos).
+
+        Sem `min_date`/`max_date`, o intervalo vai da primeira à última data dos registros.
+        """
+        datas = self.df[self._date_col]
+        if datas.dropna().empty and (self._min_date_input is None or self._max_date_input is None):
+            print("Nenhuma falha no período; indicadores de confiabilidade mantidos.")
+            return 0
+        inicio = parse_date_input(self._min_date_input)
+        fim = parse_date_input(self._max_date_input)
+        if inicio is None:
+            inicio = datas.min()
+        if fim is None:
+            fim = datas.max()
+        return indicadores.atualizar(self.falhas_por_veiculo(), inicio, fim)
+
+    def salvar_confiabilidade(self, df_indicadores: pd.DataFrame, template_path: str, output_path: str,
+                              sheet_name: str = 'Confiabilidade', sessao: Optional[SessaoPlanilha] = None) -> None:
+        """Grava os indicadores por veículo e mês em uma aba logo após 'Falhas'."""
         try:
-            wb = load_workbook(template_path)
+            widths = [10, 12, 28, 10, 18, 24, 14]
 
-            # usar nome de aba 'Falhas'
-            if 'Falhas' in wb.sheetnames:
-                wb.remove(wb['Falhas'])
+            def desenhar(wb):
+                posicao = [n for n in wb.sheetnames if n != sheet_name]
+                posicao = posicao.index('Falhas') + 1 if 'Falhas' in posicao else 0
+                # MTBF indefinido (uma única falha) fica em branco
+                escrever_aba(wb, sheet_name, df_indicadores, larguras=widths, posicao=posicao, em_branco=True)
 
-            ws_detalhes = wb.create_sheet('Falhas', 0)
+            with SessaoPlanilha.usar(sessao, template_path, output_path) as sessao:
+                if sessao.renderizar(sheet_name, impressao_dados(df_indicadores), desenhar):
+                    print(f"Indicadores de confiabilidade salvos: {output_path} (aba: {sheet_name})")
 
-            self._formatar_aba_detalhes(ws_detalhes, df_falhas)
+        except Exception as e:
+            raise Exception(f"Erro ao salvar indicadores de confiabilidade: {str(e)}")
 
-            wb.save(output_path)
-            print(f"Planilha salva com sucesso: {output_path}")
+    def salvar_na_planilha_existente(self, df_falhas: pd.DataFrame, template_path: str, output_path: str,
+                                     sessao: Optional[SessaoPlanilha] = None) -> None:
+        try:
+            # usar nome de aba 'Falhas' (primeira aba)
+            with SessaoPlanilha.usar(sessao, template_path, output_path) as sessao:
+                sessao.renderizar('Falhas', impressao_dados(df_falhas),
+                                  lambda wb: self._formatar_aba_detalhes(sessao, df_falhas))
 
         except Exception as e:
             raise Exception(f"Erro ao salvar planilha: {str(e)}")
 
-    def _formatar_aba_detalhes(self, worksheet, df_falhas: pd.DataFrame):
-        headers = ['Data', 'Veículo', 'Linha', 'Nível', 'Sistema', 'Sub Sistema', 'Agente Causador']
+    def _formatar_aba_detalhes(self, sessao: SessaoPlanilha, df_falhas: pd.DataFrame):
+        headers = self.COLUNAS_ABA
 
-        for col, header in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
+        # Larguras conforme solicitado (colunas A..G); linhas em fluxo direto para o arquivo no save,
+        # datas formatadas somente na escrita, AutoFilter na primeira linha e cabeçalho congelado
+        widths = [12, 12, 28, 10, 40, 47, 23]
+        sessao.escrever_em_fluxo('Falhas', df_falhas[headers], larguras=widths, posicao=0)
+        print("Aba de detalhes formatada com sucesso.")
 
-        for row_idx, row_data in enumerate(dataframe_to_rows(df_falhas, index=False, header=False), 2):
-            for col_idx, value in enumerate(row_data, 1):
-                worksheet.cell(row=row_idx, column=col_idx, value=value)
 
-        # Ajustar larguras conforme solicitado (colunas A..G)
-        widths = [12, 12, 28, 10, 40, 47, 23]
-        for idx, w in enumerate(widths, start=1):
-            try:
-                col_letter = get_column_letter(idx)
-                worksheet.column_dimensions[col_letter].width = w
-            except Exception:
-                pass
-
-        # Habilitar AutoFilter para permitir filtragem na primeira linha
-        try:
-            last_col = get_column_letter(worksheet.max_column)
-            last_row = worksheet.max_row
-            worksheet.auto_filter.ref = f"A1:{last_col}{last_row}"
-        except Exception:
-            pass
+# OsmCompleta.csv é lido uma única vez e compartilhado entre 'Sem Falhas' e 'Falhas'
+COLUNAS_OSM = list(dict.fromkeys(UnifiedSAFAnalyzer.COLUNAS + SAFComFalhasAnalyzer.COLUNAS))
+FILTROS_OSM = [UnifiedSAFAnalyzer.predicado(sem_falhas=True), SAFComFalhasAnalyzer.PREDICADO]
 
-        worksheet.freeze_panes = 'A2'
-        print("Aba de detalhes formatada com sucesso.")
+
+def processar_exportacoes(saf_base: Optional[ExportacaoSIMG], osm_base: Optional[ExportacaoSIMG],
+                          saf_file: str, osm_file: str, min_date_str: Optional[str], max_date_str: Optional[str],
+                          template_path: str, output_path: str, periodo_consolidado: Optional[str] = None,
+                          confiabilidade_path: Optional[str] = None, sessao: Optional[SessaoPlanilha] = None,
+                          saidas: Optional[SaidasColunares] = None) -> bool:
+    """Roda os analisadores sobre as exportações já carregadas e grava as abas.
+
+    Com `periodo_consolidado` ('D', 'W' ou 'M'), grava também os totais de todo
+    o intervalo de datas por dia, semana ou mês (ver `salvar_consolidado`).
+    Os indicadores de confiabilidade ficam em `confiabilidade_path` (padrão:
+    'confiabilidade.sqlite' ao lado da planilha) e na aba 'Confiabilidade'.
+    Todas as abas são desenhadas em uma única `SessaoPlanilha` (a informada
+    ou uma própria, gravada ao final). Com `saidas`, as grades diárias e
+    'Falhas' também são gravadas nos formatos colunares configurados, mas só
+    depois que a planilha da sessão foi salva com sucesso.
+    Retorna True se ao menos uma aba foi gerada.
+    """
+    with SessaoPlanilha.usar(sessao, template_path, output_path) as sessao:
+        return _processar_exportacoes(saf_base, osm_base, saf_file, osm_file, min_date_str, max_date_str,
+                                      template_path, output_path, periodo_consolidado, confiabilidade_path, sessao,
+                                      saidas)
+
+
+def _processar_exportacoes(saf_base, osm_base, saf_file, osm_file, min_date_str, max_date_str, template_path,
+                           output_path, periodo_consolidado, confiabilidade_path, sessao: SessaoPlanilha,
+                           saidas: Optional[SaidasColunares]) -> bool:
+    processed_any = False
+
+    # Um cubo por exportação; as grades e contagens abaixo são recortes dele
+    cubo_saf = CuboFalhas.da_exportacao(saf_base) if saf_base is not None else None
+    cubo_osm = CuboFalhas.da_exportacao(osm_base) if osm_base is not None else None
+
+    if saf_base is not None:
+        analyzer = UnifiedSAFAnalyzer(saf_file, sem_falhas=False, min_date=min_date_str, max_date=max_date_str, base=saf_base,
+                                      cubo=cubo_saf)
+        analyzer.processar_todas_linhas()
+        # salvar na aba 'SAF\'s Diárias' conforme novo nome das abas
+        analyzer.salvar_na_planilha_existente(template_path, output_path, sheet_name="SAF's Diárias", sessao=sessao)
+        if saidas is not None:
+            sessao.ao_salvar(functools.partial(saidas.gravar, 'saf_diarias', analyzer.grade_diaria()))
+        if periodo_consolidado:
+            analyzer.salvar_consolidado(template_path, output_path, periodo_consolidado, sessao=sessao)
+        processed_any = True
+
+    if osm_base is not None:
+        analyzer2 = UnifiedSAFAnalyzer(osm_file, sem_falhas=True, min_date=min_date_str, max_date=max_date_str, base=osm_base,
+                                       cubo=cubo_osm)
+        analyzer2.processar_todas_linhas()
+        # salvar na aba 'Sem Falhas' conforme novo nome das abas
+        analyzer2.salvar_na_planilha_existente(template_path, output_path, sheet_name='Sem Falhas', sessao=sessao)
+        if saidas is not None:
+            sessao.ao_salvar(functools.partial(saidas.gravar, 'sem_falhas', analyzer2.grade_diaria()))
+        if periodo_consolidado:
+            analyzer2.salvar_consolidado(template_path, output_path, periodo_consolidado, sessao=sessao)
+        processed_any = True
+
+    # Processar falhas do equipamento (detalhado) se existir o arquivo OSM
+    if osm_base is not None:
+        falhas_analyzer = SAFComFalhasAnalyzer(osm_file, min_date=min_date_str, max_date=max_date_str, base=osm_base,
+                                               cubo=cubo_osm)
+        df_falhas = falhas_analyzer.processar_falhas()
+        falhas_analyzer.salvar_na_planilha_existente(df_falhas, template_path, output_path, sessao=sessao)
+        if saidas is not None:
+            sessao.ao_salvar(functools.partial(saidas.gravar, 'falhas', df_falhas[SAFComFalhasAnalyzer.COLUNAS_ABA]))
+
+        # MTBF e taxas por veículo: o histórico é atualizado apenas nos dias do intervalo processado
+        confiabilidade_path = confiabilidade_path or str(pathlib.Path(output_path).with_name('confiabilidade.sqlite'))
+        with IndicadoresConfiabilidade(confiabilidade_path) as indicadores:
+            falhas_analyzer.atualizar_confiabilidade(indicadores)
+            falhas_analyzer.salvar_confiabilidade(indicadores.indicadores(), template_path, output_path,
+                                                  sessao=sessao)
+        processed_any = True
+
+    return processed_any
 
 
 def main():
@@ -435,32 +549,50 @@ def main():
         min_date_str = '01-10-2025'
         max_date_str = '31-10-2025'
 
+        # Totais de todo o intervalo (ex.: um trimestre) por 'D' (dia), 'W' (semana) ou 'M' (mês); None desliga
+        periodo_consolidado = None
+
+        # Leitura em blocos para exportações de vários anos (None lê o arquivo inteiro de uma vez)
+        tamanho_bloco = None
+
+        # Saídas colunares ao lado da planilha (pasta 'saidas'): 'parquet', 'csv' e/ou 'arrow'; [] desliga
+        formatos_saida = ['parquet']
+
+        # Motor de leitura dos CSVs: 'auto' (pyarrow quando instalado), 'pyarrow' ou 'c'
+        motor_csv = 'auto'
+
+        # Histórico local incremental (SQLite): cada exportação é incorporada como delta e os
+        # analisadores consultam o período direto do histórico, sem reprocessar meses antigos
+        usar_historico = False
+        historico_path = base / "historico_simg.sqlite"
+
         # Arquivos esperados
         saf_file = base / "SafCompleta.csv"
         osm_file = base / "OsmCompleta.csv"
 
-        processed_any = False
-
-        if saf_file.exists():
-            analyzer = UnifiedSAFAnalyzer(str(saf_file), sem_falhas=False, min_date=min_date_str, max_date=max_date_str)
-            analyzer.processar_todas_linhas()
-            # salvar na aba 'SAF\'s Diárias' conforme novo nome das abas
-            analyzer.salvar_na_planilha_existente(str(template_path), str(output_path), sheet_name="SAF's Diárias")
-            processed_any = True
-
-        if osm_file.exists():
-            analyzer2 = UnifiedSAFAnalyzer(str(osm_file), sem_falhas=True, min_date=min_date_str, max_date=max_date_str)
-            analyzer2.processar_todas_linhas()
-            # salvar na aba 'Sem Falhas' conforme novo nome das abas
-            analyzer2.salvar_na_planilha_existente(str(template_path), str(output_path), sheet_name='Sem Falhas')
-            processed_any = True
-
-        # Processar falhas do equipamento (detalhado) se existir o arquivo OSM
-        if osm_file.exists():
-            falhas_analyzer = SAFComFalhasAnalyzer(str(osm_file), min_date=min_date_str, max_date=max_date_str)
-            df_falhas = falhas_analyzer.processar_falhas()
-            falhas_analyzer.salvar_na_planilha_existente(df_falhas, str(template_path), str(output_path))
-            processed_any = True
+        if usar_historico:
+            with HistoricoSIMG(str(historico_path)) as historico:
+                if saf_file.exists():
+                    historico.ingerir_csv(str(saf_file), 'saf')
+                if osm_file.exists():
+                    historico.ingerir_csv(str(osm_file), 'osm')
+                saf_base = historico.exportacao('saf', min_date=min_date_str, max_date=max_date_str,
+                                                categorias=categorias_simg())
+                osm_base = historico.exportacao('osm', min_date=min_date_str, max_date=max_date_str,
+                                                categorias=categorias_simg(), filtros=FILTROS_OSM)
+        else:
+            saf_base = carregar_exportacao(str(saf_file), min_date=min_date_str, max_date=max_date_str,
+                                           colunas=UnifiedSAFAnalyzer.COLUNAS, categorias=categorias_simg(),
+                                           filtros=[UnifiedSAFAnalyzer.predicado(sem_falhas=False)],
+                                           tamanho_bloco=tamanho_bloco, motor=motor_csv) if saf_file.exists() else None
+            osm_base = carregar_exportacao(str(osm_file), min_date=min_date_str, max_date=max_date_str,
+                                           colunas=COLUNAS_OSM, categorias=categorias_simg(),
+                                           filtros=FILTROS_OSM, tamanho_bloco=tamanho_bloco,
+                                           motor=motor_csv) if osm_file.exists() else None
+
+        saidas = SaidasColunares(base / PASTA_SAIDAS, formatos_saida)
+        processed_any = processar_exportacoes(saf_base, osm_base, str(saf_file), str(osm_file), min_date_str, max_date_str,
+                                              str(template_path), str(output_path), periodo_consolidado, saidas=saidas)
 
         if not processed_any:
             print("Nenhum arquivo 'SafCompleta.csv' ou 'OsmCompleta.csv' encontrado no diretório esperado:", base)
@@ -0,0 +1,486 @@
+import contextlib
+import datetime
+import functools
+import hashlib
+import numbers
+import os
+import pathlib
+import posixpath
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import pandas as pd
+from openpyxl import load_workbook, Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.compat.numbers import NUMERIC_TYPES
+from openpyxl.compat.strings import safe_string
+from openpyxl.packaging.custom import StringProperty
+from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+# Formato das datas nas abas de detalhes do Farol
+FORMATO_DATA = '%d/%m/%Y'
+
+# Largura máxima das colunas ajustadas automaticamente
+LARGURA_MAXIMA = 50
+
+# Linhas medidas (no máximo) no ajuste automático de larguras de abas muito longas
+AMOSTRA_LARGURAS = 50000
+
+# Prefixo das propriedades do arquivo que guardam a impressão digital de cada aba gerada
+PREFIXO_IMPRESSAO = 'farol:'
+
+# Prefixo das propriedades do arquivo que marcam as abas gravadas em fluxo (`SessaoPlanilha.escrever_em_fluxo`)
+PREFIXO_FLUXO = 'farol-fluxo:'
+
+# Linhas de dados por trecho de XML enviado ao arquivo nas abas em fluxo
+LINHAS_POR_TRECHO = 1000
+
+_NS_PLANILHA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_RELACAO = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PACOTE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_NS_PROPRIEDADES = '{http://schemas.openxmlformats.org/officeDocument/2006/custom-properties}'
+_RE_ABRE_DADOS = re.compile(rb'<sheetData\s*(/?)>')
+_FECHA_DADOS = b'</sheetData>'
+_FECHA_LINHA = b'</row>'
+_RE_DIMENSAO = re.compile(rb'<dimension ref="[^"]*"')
+# células que dependem de partes do arquivo (estilos, textos compartilhados): não podem ser copiadas entre arquivos
+_RE_DEPENDENTE = re.compile(rb' s="|t="s"')
+
+
+def _colunas_formatadas(df: pd.DataFrame, formato_data: str, em_branco: bool = False) -> List[pd.Series]:
+    colunas = [serie.dt.strftime(formato_data) if pd.api.types.is_datetime64_any_dtype(serie) else serie
+               for _, serie in df.items()]
+    if em_branco:
+        colunas = [serie.astype(object).where(serie.notna(), None) if serie.hasnans else serie for serie in colunas]
+    return colunas
+
+
+def linhas_formatadas(df: pd.DataFrame, formato_data: str = FORMATO_DATA, em_branco: bool = False) -> Iterator[Tuple]:
+    """Linhas de `df` prontas para a planilha, com as colunas de data formatadas só aqui.
+
+    Apenas as colunas datetime são convertidas (uma Series por coluna); o
+    restante é lido direto do DataFrame, sem cópia do quadro inteiro.
+    Datas ausentes viram NaN, como no `strftime` do pandas; com `em_branco`,
+    valores ausentes viram None (célula vazia).
+    """
+    return zip(*_colunas_formatadas(df, formato_data, em_branco))
+
+
+def _maior_texto(serie: pd.Series, formato_data: str) -> int:
+    """Maior `len(str(v))` da coluna como será escrita (datas formatadas); None não conta.
+
+    Mede só os valores distintos, com comprimentos vetorizados (`.str.len()`);
+    datas repetidas são formatadas uma única vez.
+    """
+    valores = serie.drop_duplicates()
+    if pd.api.types.is_datetime64_any_dtype(valores):
+        valores = valores.dt.strftime(formato_data)
+    ausentes = valores.isna()
+    maior = 0
+    if not ausentes.all():
+        maior = int(valores[~ausentes].astype(str).str.len().max())
+    # ausentes como NaN/NaT entram com o texto que a célula receberia ('nan')
+    return max([maior] + [len(str(v)) for v in valores[ausentes] if v is not None])
+
+
+def larguras_automaticas(df: pd.DataFrame, formato_data: str = FORMATO_DATA,
+                         maximo: int = LARGURA_MAXIMA, amostra: Optional[int] = None) -> List[float]:
+    """Larguras das colunas (maior texto, cabeçalho incluído, + 2, até `maximo`) calculadas do DataFrame.
+
+    Os comprimentos saem de operações vetorizadas sobre cada coluna, sem
+    percorrer as células da planilha. Com `amostra`, abas mais longas que
+    isso são medidas em linhas igualmente espaçadas (no máximo `amostra`).
+    """
+    if amostra and len(df) > amostra:
+        df = df.iloc[::-(-len(df) // amostra)]
+    return [min(max(_maior_texto(serie, formato_data), len(str(nome))) + 2, maximo) for nome, serie in df.items()]
+
+
+def _celula_cabecalho(ws, valor) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=valor)
+    cell.font = Font(bold=True, color='FFFFFF')
+    cell.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    cell.alignment = Alignment(horizontal='center')
+    return cell
+
+
+def escrever_aba(wb, sheet_name: str, df: pd.DataFrame, larguras: Optional[Sequence[Optional[float]]] = None,
+                 posicao: Optional[int] = None, autofiltro: bool = True, congelar: Optional[str] = 'A2',
+                 formato_data: str = FORMATO_DATA, em_branco: bool = False):
+    """Grava `df` em uma aba nova (substituindo a existente): cabeçalho estilizado e uma linha por registro.
+
+    As linhas são enviadas com `append`, sem consultas célula a célula, e as
+    datas são formatadas durante a escrita; as células ficam no workbook até
+    o `save`. Para abas longas, use `SessaoPlanilha.escrever_em_fluxo`, que
+    mantém no workbook só o cabeçalho. Larguras (None mantém o padrão) e
+    painel congelado são definidos antes das linhas, como o modo write-only
+    exige. `em_branco` deixa vazias as células de valores ausentes.
+    """
+    if sheet_name in wb.sheetnames:
+        wb.remove(wb[sheet_name])
+    ws = wb.create_sheet(sheet_name, posicao)
+
+    for idx, largura in enumerate(larguras or [], 1):
+        if largura:
+            ws.column_dimensions[get_column_letter(idx)].width = largura
+    if congelar:
+        ws.freeze_panes = congelar
+
+    ws.append([_celula_cabecalho(ws, nome) for nome in df.columns])
+    for linha in linhas_formatadas(df, formato_data, em_branco):
+        ws.append(linha)
+
+    if autofiltro:
+        ws.auto_filter.ref = f"A1:{get_column_letter(max(len(df.columns), 1))}{len(df) + 1}"
+    return ws
+
+
+def _xml_celula(ref: str, valor, formato_data: str) -> str:
+    """XML da célula `ref` como o openpyxl a grava (texto em linha, sem estilo); vazio para valores ausentes."""
+    if valor is None or valor is pd.NaT:
+        return ''
+    if isinstance(valor, bool):
+        return f'<c r="{ref}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, NUMERIC_TYPES):
+        numero = safe_string(valor)
+        return f'<c r="{ref}" t="n"><v>{numero}</v></c>' if numero else ''
+    if isinstance(valor, (datetime.date, pd.Timestamp)):
+        valor = valor.strftime(formato_data)
+    valor = str(valor)
+    if not valor:
+        return ''
+    if ILLEGAL_CHARACTERS_RE.search(valor):
+        raise IllegalCharacterError(f"{valor} cannot be used in worksheets.")
+    espaco = ' xml:space="preserve"' if valor.strip() and valor != valor.strip() else ''
+    return f'<c r="{ref}" t="inlineStr"><is><t{espaco}>{escape(valor)}</t></is></c>'
+
+
+def _xml_linhas(df: pd.DataFrame, formato_data: str, em_branco: bool) -> Iterator[bytes]:
+    """Linhas de `df` no XML da aba, a partir da linha 2, em trechos de LINHAS_POR_TRECHO linhas."""
+    letras = [get_column_letter(idx) for idx in range(1, len(df.columns) + 1)]
+    trecho = []
+    for r, linha in enumerate(linhas_formatadas(df, formato_data, em_branco), 2):
+        celulas = ''.join(_xml_celula(f'{letra}{r}', valor, formato_data) for letra, valor in zip(letras, linha))
+        trecho.append(f'<row r="{r}">{celulas}</row>')
+        if len(trecho) == LINHAS_POR_TRECHO:
+            yield ''.join(trecho).encode('utf-8')
+            trecho = []
+    if trecho:
+        yield ''.join(trecho).encode('utf-8')
+
+
+def _dimensao(df: pd.DataFrame) -> bytes:
+    return f'<dimension ref="A1:{get_column_letter(max(len(df.columns), 1))}{len(df) + 1}"'.encode('utf-8')
+
+
+def _trechos_aba(origem: BinaryIO, bloco: int = 1 << 20) -> Iterator[Tuple[str, bytes]]:
+    """Divide o XML de uma aba em trechos 'antes', 'cabecalho', 'linhas' e 'depois', lendo em blocos.
+
+    'antes' vai até a abertura de <sheetData>, 'cabecalho' é a primeira
+    <row> e 'depois' começa no fechamento de </sheetData> (uma <sheetData/>
+    vazia é aberta e fechada). As demais linhas vêm em vários trechos
+    'linhas', sem carregar a aba inteira.
+    """
+    buffer = b''
+    abertura = None
+    while abertura is None:
+        dados = origem.read(bloco)
+        if not dados:
+            raise ValueError('XML da aba sem <sheetData>')
+        buffer += dados
+        abertura = _RE_ABRE_DADOS.search(buffer)
+    yield 'antes', buffer[:abertura.start()] + b'<sheetData>'
+    buffer = (_FECHA_DADOS if abertura.group(1) else b'') + buffer[abertura.end():]
+
+    cabecalho = True
+    while True:
+        fim = buffer.find(_FECHA_DADOS)
+        if cabecalho:
+            fim_linha = buffer.find(_FECHA_LINHA, 0, fim if fim >= 0 else len(buffer))
+            if fim_linha >= 0 or fim >= 0:
+                corte = fim_linha + len(_FECHA_LINHA) if fim_linha >= 0 else fim
+                yield 'cabecalho', buffer[:corte]
+                buffer = buffer[corte:]
+                cabecalho = False
+                continue
+        elif fim >= 0:
+            if fim:
+                yield 'linhas', buffer[:fim]
+            yield 'depois', buffer[fim:] + origem.read()
+            return
+        dados = origem.read(bloco)
+        if not dados:
+            raise ValueError('XML da aba sem </sheetData>')
+        if not cabecalho:
+            # o fim de um trecho pode conter o início de </sheetData>
+            corte = max(len(buffer) - len(_FECHA_DADOS), 0)
+            if corte:
+                yield 'linhas', buffer[:corte]
+            buffer = buffer[corte:]
+        buffer += dados
+
+
+def _partes_das_abas(arquivo: zipfile.ZipFile) -> Dict[str, str]:
+    """Nome de cada aba -> parte do pacote xlsx com o XML dela (ex.: 'xl/worksheets/sheet1.xml')."""
+    alvos = {}
+    for relacao in ElementTree.fromstring(arquivo.read('xl/_rels/workbook.xml.rels')).iter(f'{_NS_PACOTE}Relationship'):
+        alvo = relacao.get('Target')
+        alvos[relacao.get('Id')] = alvo[1:] if alvo.startswith('/') else posixpath.normpath(posixpath.join('xl', alvo))
+    planilha = ElementTree.fromstring(arquivo.read('xl/workbook.xml'))
+    return {aba.get('name'): alvos.get(aba.get(f'{_NS_RELACAO}id')) for aba in planilha.iter(f'{_NS_PLANILHA}sheet')}
+
+
+def _abas_marcadas_em_fluxo(arquivo: zipfile.ZipFile) -> List[str]:
+    if 'docProps/custom.xml' not in arquivo.namelist():
+        return []
+    propriedades = ElementTree.fromstring(arquivo.read('docProps/custom.xml'))
+    return [prop.get('name')[len(PREFIXO_FLUXO):] for prop in propriedades.iter(f'{_NS_PROPRIEDADES}property')
+            if prop.get('name', '').startswith(PREFIXO_FLUXO)]
+
+
+def _aparar_aba(xml: BinaryIO) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """XML da aba só com o cabeçalho e a dimensão original; (None, None) se as linhas não podem ser copiadas."""
+    partes, dimensao, anterior = [], None, b''
+    for tipo, trecho in _trechos_aba(xml):
+        if tipo == 'linhas':
+            if _RE_DEPENDENTE.search(anterior[-8:] + trecho):
+                return None, None
+            anterior = trecho
+            continue
+        if tipo == 'antes':
+            encontrada = _RE_DIMENSAO.search(trecho)
+            dimensao = encontrada.group(0) if encontrada else None
+        partes.append(trecho)
+    return b''.join(partes), dimensao
+
+
+@contextlib.contextmanager
+def _sem_linhas_em_fluxo(path: pathlib.Path) -> Iterator[Tuple[object, Dict[str, Tuple[str, Optional[bytes]]]]]:
+    """Cópia temporária de `path` em que as abas marcadas em fluxo trazem só o cabeçalho.
+
+    Gera (arquivo a carregar, {aba: (parte com as linhas originais, dimensão)}).
+    Abas cujas linhas dependem de estilos ou textos compartilhados (ex.:
+    regravadas no Excel) são copiadas inteiras e carregadas normalmente.
+    """
+    with zipfile.ZipFile(path) as origem:
+        abas = _abas_marcadas_em_fluxo(origem)
+        if not abas:
+            yield path, {}
+            return
+        partes = _partes_das_abas(origem)
+        alvos = {partes[aba]: aba for aba in abas if partes.get(aba)}
+        aparadas = {}
+        with tempfile.TemporaryFile() as copia:
+            with zipfile.ZipFile(copia, 'w', zipfile.ZIP_DEFLATED) as destino:
+                for info in origem.infolist():
+                    if info.filename in alvos:
+                        with origem.open(info) as xml:
+                            aparado, dimensao = _aparar_aba(xml)
+                        if aparado is not None:
+                            destino.writestr(info.filename, aparado)
+                            aparadas[alvos[info.filename]] = (info.filename, dimensao)
+                            continue
+                    with origem.open(info) as src, destino.open(info.filename, 'w', force_zip64=True) as dst:
+                        shutil.copyfileobj(src, dst)
+            copia.seek(0)
+            yield copia, aparadas
+
+
+def _linhas_copiadas(path: pathlib.Path, parte: str) -> Iterator[bytes]:
+    """Linhas de dados (sem o cabeçalho) da aba guardada em `parte` do xlsx `path`, em trechos."""
+    with zipfile.ZipFile(path) as arquivo, arquivo.open(parte) as xml:
+        for tipo, trecho in _trechos_aba(xml):
+            if tipo == 'linhas':
+                yield trecho
+
+
+def _completar_abas(origem_path: pathlib.Path, destino_path: pathlib.Path,
+                    linhas: Dict[str, Tuple[Callable[[], Iterator[bytes]], Optional[bytes]]]) -> None:
+    """Copia o xlsx `origem_path` para `destino_path` inserindo, em fluxo, as linhas das abas em `linhas`.
+
+    Cada aba recebe (gerador dos trechos de linhas após o cabeçalho,
+    dimensão final ou None); nenhum XML de aba é carregado inteiro.
+    """
+    with zipfile.ZipFile(origem_path) as origem, zipfile.ZipFile(destino_path, 'w', zipfile.ZIP_DEFLATED) as destino:
+        partes = {parte: aba for aba, parte in _partes_das_abas(origem).items() if aba in linhas}
+        for info in origem.infolist():
+            with origem.open(info) as src, destino.open(info.filename, 'w', force_zip64=True) as dst:
+                if info.filename not in partes:
+                    shutil.copyfileobj(src, dst)
+                    continue
+                gerar, dimensao = linhas[partes[info.filename]]
+                for tipo, trecho in _trechos_aba(src):
+                    if tipo == 'antes' and dimensao:
+                        trecho = _RE_DIMENSAO.sub(lambda _: dimensao, trecho, count=1)
+                    if tipo == 'depois':
+                        for linhas_xml in gerar():
+                            dst.write(linhas_xml)
+                    dst.write(trecho)
+
+
+def impressao_dados(*partes) -> str:
+    """Impressão digital (sha256) dos dados que geram uma aba: DataFrames (valores, índice, colunas e tipos) e parâmetros."""
+    h = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, pd.DataFrame):
+            h.update(repr((list(parte.columns), [str(t) for t in parte.dtypes])).encode('utf-8'))
+            h.update(pd.util.hash_pandas_object(parte, index=True).to_numpy().tobytes())
+        else:
+            h.update(repr(parte).encode('utf-8'))
+    return h.hexdigest()
+
+
+class SessaoPlanilha:
+    """Planilha de saída (dados_resumo.xlsx) aberta uma única vez por execução.
+
+    Todos os analisadores desenham suas abas em `wb` e o arquivo é gravado
+    uma única vez ao final (`salvar`, chamado ao sair do `with`), de forma
+    atômica: arquivo temporário na mesma pasta + `os.replace`. Cada aba
+    gerada guarda, nas propriedades personalizadas do arquivo, a impressão
+    digital dos dados que a produziram; `renderizar` não refaz uma aba cujos
+    dados não mudaram e, se nenhuma aba mudou, o arquivo não é regravado.
+    O openpyxl sempre serializa o workbook inteiro, por isso a economia está
+    em não redesenhar abas nem regravar o arquivo sem necessidade.
+    Ações registradas com `ao_salvar` (ex.: saídas colunares) só rodam
+    depois que a planilha foi gravada com sucesso (ou não precisou ser),
+    para que os arquivos derivados nunca fiquem à frente do xlsx.
+
+    Abas longas de detalhes ('Falhas', 'Detalhes Manutenções SSP') são
+    escritas com `escrever_em_fluxo`: o workbook guarda só o cabeçalho e, no
+    `salvar`, as linhas são geradas direto no XML do arquivo, em trechos. Ao
+    abrir a planilha, essas abas também são carregadas só com o cabeçalho, e
+    as que não forem redesenhadas têm as linhas copiadas do arquivo anterior.
+    Assim a memória não cresce com o número de linhas, com ou sem template.
+    """
+
+    def __init__(self, template_path, output_path):
+        self.template_path = pathlib.Path(template_path)
+        self.output_path = pathlib.Path(output_path)
+        # abas em fluxo: redesenhadas nesta execução (dados, formato de data, em branco)
+        # e mantidas do arquivo anterior (parte do xlsx com as linhas, dimensão)
+        self._em_fluxo: Dict[str, Tuple[pd.DataFrame, str, bool]] = {}
+        self._linhas_anteriores: Dict[str, Tuple[str, Optional[bytes]]] = {}
+        if self.template_path.exists():
+            with _sem_linhas_em_fluxo(self.template_path) as (arquivo, self._linhas_anteriores):
+                self.wb = load_workbook(arquivo)
+        else:
+            # planilha nova: abas escritas em modo streaming
+            self.wb = Workbook(write_only=True)
+        self.alteradas: List[str] = []
+        self._impressoes: Dict[str, str] = {
+            prop.name[len(PREFIXO_IMPRESSAO):]: prop.value
+            for prop in self.wb.custom_doc_props if prop.name.startswith(PREFIXO_IMPRESSAO)
+        }
+        self._apos_salvar: List[Callable[[], None]] = []
+
+    def __enter__(self) -> 'SessaoPlanilha':
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.salvar()
+
+    @classmethod
+    @contextlib.contextmanager
+    def usar(cls, sessao: Optional['SessaoPlanilha'], template_path, output_path) -> Iterator['SessaoPlanilha']:
+        """A sessão informada ou, sem ela, uma sessão própria (carrega e grava só esta operação)."""
+        if sessao is not None:
+            yield sessao
+            return
+        with cls(template_path, output_path) as nova:
+            yield nova
+
+    def renderizar(self, sheet_name: str, impressao: Optional[str], desenhar: Callable[[Workbook], None]) -> bool:
+        """Desenha a aba com `desenhar(wb)`, exceto se ela existe e `impressao` é a mesma da última geração."""
+        if impressao is not None and sheet_name in self.wb.sheetnames and self._impressoes.get(sheet_name) == impressao:
+            print(f"Aba '{sheet_name}' sem alterações; mantida.")
+            return False
+        desenhar(self.wb)
+        self.marcar_alterada(sheet_name, impressao)
+        return True
+
+    def escrever_em_fluxo(self, sheet_name: str, df: pd.DataFrame, autofiltro: bool = True,
+                          formato_data: str = FORMATO_DATA, em_branco: bool = False, **opcoes):
+        """Como `escrever_aba`, mas o workbook recebe só o cabeçalho; as linhas vão para o arquivo no `salvar`.
+
+        Estilo do cabeçalho, larguras, painel congelado e AutoFilter (já com
+        todas as linhas) são os de `escrever_aba`. `df` fica referenciado até o `salvar`.
+        """
+        ws = escrever_aba(self.wb, sheet_name, df.iloc[:0], autofiltro=autofiltro, formato_data=formato_data, **opcoes)
+        if autofiltro:
+            ws.auto_filter.ref = f"A1:{get_column_letter(max(len(df.columns), 1))}{len(df) + 1}"
+        self._em_fluxo[sheet_name] = (df, formato_data, em_branco)
+        return ws
+
+    def marcar_alterada(self, sheet_name: str, impressao: Optional[str] = None) -> None:
+        # aba redesenhada: as linhas do arquivo anterior não valem mais
+        self._linhas_anteriores.pop(sheet_name, None)
+        if sheet_name not in self.alteradas:
+            self.alteradas.append(sheet_name)
+        if impressao is not None:
+            self._impressoes[sheet_name] = impressao
+        else:
+            self._impressoes.pop(sheet_name, None)
+
+    def _gravar_impressoes(self) -> None:
+        props = self.wb.custom_doc_props
+        for prop in [p for p in props if p.name.startswith((PREFIXO_IMPRESSAO, PREFIXO_FLUXO))]:
+            del props[prop.name]
+        for sheet_name, impressao in self._impressoes.items():
+            if sheet_name in self.wb.sheetnames:
+                props.append(StringProperty(name=PREFIXO_IMPRESSAO + sheet_name, value=impressao))
+        for sheet_name in self._linhas_em_fluxo():
+            props.append(StringProperty(name=PREFIXO_FLUXO + sheet_name, value='1'))
+
+    def _linhas_em_fluxo(self) -> Dict[str, Tuple[Callable[[], Iterator[bytes]], Optional[bytes]]]:
+        """Abas cujas linhas são inseridas no arquivo após o `save` do openpyxl (ver `_completar_abas`)."""
+        linhas = {sheet_name: (functools.partial(_linhas_copiadas, self.template_path, parte), dimensao)
+                  for sheet_name, (parte, dimensao) in self._linhas_anteriores.items()}
+        for sheet_name, (df, formato_data, em_branco) in self._em_fluxo.items():
+            linhas[sheet_name] = (functools.partial(_xml_linhas, df, formato_data, em_branco), _dimensao(df))
+        return {sheet_name: v for sheet_name, v in linhas.items() if sheet_name in self.wb.sheetnames}
+
+    def ao_salvar(self, acao: Callable[[], None]) -> None:
+        """Executa `acao` depois que `salvar` terminar sem erro (descartada se a sessão falhar)."""
+        self._apos_salvar.append(acao)
+
+    def salvar(self) -> bool:
+        """Grava o arquivo (atômico) se preciso e, em seguida, executa as ações de `ao_salvar`."""
+        gravada = self._gravar()
+        pendentes, self._apos_salvar = self._apos_salvar, []
+        for acao in pendentes:
+            acao()
+        return gravada
+
+    def _gravar(self) -> bool:
+        """Grava o arquivo (atômico) se alguma aba mudou ou se a saída ainda não reflete o template."""
+        mesma_planilha = self.output_path.exists() and self.output_path.resolve() == self.template_path.resolve()
+        if not self.alteradas and mesma_planilha:
+            print(f"Nenhuma aba alterada; {self.output_path.name} não foi regravada.")
+            return False
+
+        self._gravar_impressoes()
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.output_path.with_name(f".{self.output_path.stem}.tmp{self.output_path.suffix}")
+        completo = self.output_path.with_name(f".{self.output_path.stem}.fluxo{self.output_path.suffix}")
+        try:
+            self.wb.save(tmp)
+            linhas = self._linhas_em_fluxo()
+            if linhas:
+                _completar_abas(tmp, completo, linhas)
+                os.replace(completo, tmp)
+            os.replace(tmp, self.output_path)
+        finally:
+            for resto in (tmp, completo):
+                if resto.exists():
+                    resto.unlink()
+        print(f"Planilha salva: {self.output_path} (abas alteradas: {', '.join(self.alteradas) or 'nenhuma'})")
+        return True
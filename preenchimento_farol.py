@@ -7,6 +7,8 @@ import calendar
 import datetime
 import pyautogui
 
+from saidas import PASTA_SAIDAS, ler_saida
+
 pyautogui.FAILSAFE = True
 pyautogui.PAUSE = 0.3
 
@@ -187,113 +189,125 @@ def fill_sequence(df: pd.DataFrame, mapping: dict, start_row: int = 2, count: Op
         time.sleep(0.2)
 
 if __name__ == "__main__":
-    # Leitura dos dados
-    try:
-        df = read_data(DADOS_PATH)
-    except Exception as e:
-        print("Erro ao ler dados_resumo.xlsx:", e)
-        raise
-
-    # Ler aba específica do arquivo dados_resumo.xlsx
-    try:
-        df_safts = pd.read_excel(DADOS_PATH, sheet_name="SAF's Diárias")
-    except Exception as e:
-        print(f"Erro ao ler aba 'SAF's Diárias' de {DADOS_PATH}: {e}")
-        raise
-
-    # As colunas B,C,D correspondem a índices 1,2,3 (0-based: 1,2,3)
-    # Vamos pegar até 31 linhas (dias 1..31) da planilha de resumo; assumir que cada coluna tem os valores por dia
-    # Ajuste conforme a estrutura real do seu arquivo
-    # -------- TUE -----------
-    try:
-        col_B = df_safts.iloc[:, 1].fillna("")
-        col_C = df_safts.iloc[:, 2].fillna("")
-        col_D = df_safts.iloc[:, 3].fillna("")
-    except Exception as e:
-        print(f"Erro ao extrair colunas B,C,D: {e}")
-        raise
-
-    # -------- OESTE -----------
-    try:
-        col_F = df_safts.iloc[:, 5].fillna("")
-        col_G = df_safts.iloc[:, 6].fillna("")
-        col_H = df_safts.iloc[:, 7].fillna("")
-    except Exception as e:
-        print(f"Erro ao extrair colunas F,G,H: {e}")
-        raise
-
-    # -------- NORDESTE -----------
-    try:
-        col_J = df_safts.iloc[:, 9].fillna("")
-        col_K = df_safts.iloc[:, 10].fillna("")
-        col_L = df_safts.iloc[:, 11].fillna("")
-    except Exception as e:
-        print(f"Erro ao extrair colunas J,K,L: {e}")
-        raise
-
-    # -------- SOBRAL -----------
-    try:
-        col_N = df_safts.iloc[:, 13].fillna("")
-        col_O = df_safts.iloc[:, 14].fillna("")
-        col_P = df_safts.iloc[:, 15].fillna("")
-    except Exception as e:
-        print(f"Erro ao extrair colunas N,O,P: {e}")
-        raise
-
-    # -------- CARIRI -----------
-    try:
-        col_R = df_safts.iloc[:, 17].fillna("")
-        col_S = df_safts.iloc[:, 18].fillna("")
-        col_T = df_safts.iloc[:, 19].fillna("")
-    except Exception as e:
-        print(f"Erro ao extrair colunas R,S,T: {e}")
-        raise
-
-
-    # Preparar séries para níveis A (B), B (C), C (D)
-    # Detectar e pular linhas de cabeçalho (por exemplo, que contenham 'TUE', 'A', 'B', 'C')
-    header_labels = {'TUE', 'A', 'B', 'C', 'NÍVEL', 'NIVEL', "TUE", "NORDESTE", "OESTE", "SOBRAL", "CARIRI", ""}
-
-    # criar DataFrame com as três colunas lado a lado para inspeção de linhas iniciais
-    cols_df = pd.concat([col_B, col_C, col_D, col_F, col_G, col_H, col_O, col_P, col_R, col_S, col_T], axis=1)
-
-    # encontrar primeiro índice que não parece ser cabeçalho
-    start_idx = 0
-    for idx in range(len(cols_df)):
-        row_vals = cols_df.iloc[idx].astype(str).str.strip().str.upper().tolist()
-        # se todos os valores estão vazios ou em header_labels, considerar como linha de cabeçalho
-        all_header = all((v == '' or v in header_labels) for v in row_vals)
-        if not all_header:
-            start_idx = idx
-            break
-
-    if start_idx != 0:
-        print(f"Pulei {start_idx} linhas iniciais (prováveis cabeçalhos) antes de coletar os 31 dias.")
-
-    # -------- TUE -----------
-    series_TUE_A = col_B.iloc[start_idx:].reset_index(drop=True)
-    series_TUE_B = col_C.iloc[start_idx:].reset_index(drop=True)
-    series_TUE_C = col_D.iloc[start_idx:].reset_index(drop=True)
-
-    # -------- OESTE -----------
-    series_OESTE_A = col_F.iloc[start_idx:].reset_index(drop=True)
-    series_OESTE_B = col_G.iloc[start_idx:].reset_index(drop=True)
-    series_OESTE_C = col_H.iloc[start_idx:].reset_index(drop=True)
-
-    # -------- NORDESTE -----------
-    series_NORDESTE_A = col_J.iloc[start_idx:].reset_index(drop=True)
-    series_NORDESTE_B = col_K.iloc[start_idx:].reset_index(drop=True)
-    series_NORDESTE_C = col_L.iloc[start_idx:].reset_index(drop=True)
-
-    # -------- SOBRAL -----------
-    series_SOBRAL_A = col_N.iloc[start_idx:].reset_index(drop=True)
-    series_SOBRAL_B = col_O.iloc[start_idx:].reset_index(drop=True)
-    series_SOBRAL_C = col_P.iloc[start_idx:].reset_index(drop=True)
-
-    # -------- CARIRI -----------
-    series_CARIRI_A = col_R.iloc[start_idx:].reset_index(drop=True)
-    series_CARIRI_B = col_S.iloc[start_idx:].reset_index(drop=True)
-    series_CARIRI_C = col_T.iloc[start_idx:].reset_index(drop=True)
+    # Grade diária em formato colunar (pasta 'saidas', gravada por mining_combined/processar_farol):
+    # colunas tipadas '<linha> <nível>', uma linha por dia, sem abrir dados_resumo.xlsx;
+    # se a grade for mais antiga que a planilha, vale a planilha
+    grade = ler_saida(DADOS_PATH.parent / PASTA_SAIDAS, 'saf_diarias', referencia=DADOS_PATH)
+    if grade is not None:
+        print(f"Grade diária lida de {DADOS_PATH.parent / PASTA_SAIDAS} ({len(grade)} dias).")
+        series_TUE_A, series_TUE_B, series_TUE_C = (grade[f'TUE {nivel}'] for nivel in 'ABC')
+        series_OESTE_A, series_OESTE_B, series_OESTE_C = (grade[f'OESTE {nivel}'] for nivel in 'ABC')
+        series_NORDESTE_A, series_NORDESTE_B, series_NORDESTE_C = (grade[f'NORDESTE {nivel}'] for nivel in 'ABC')
+        series_SOBRAL_A, series_SOBRAL_B, series_SOBRAL_C = (grade[f'SOBRAL {nivel}'] for nivel in 'ABC')
+        series_CARIRI_A, series_CARIRI_B, series_CARIRI_C = (grade[f'CARIRI {nivel}'] for nivel in 'ABC')
+    else:
+        # Leitura dos dados
+        try:
+            df = read_data(DADOS_PATH)
+        except Exception as e:
+            print("Erro ao ler dados_resumo.xlsx:", e)
+            raise
+
+        # Ler aba específica do arquivo dados_resumo.xlsx
+        try:
+            df_safts = pd.read_excel(DADOS_PATH, sheet_name="SAF's Diárias")
+        except Exception as e:
+            print(f"Erro ao ler aba 'SAF's Diárias' de {DADOS_PATH}: {e}")
+            raise
+
+        # As colunas B,C,D correspondem a índices 1,2,3 (0-based: 1,2,3)
+        # Vamos pegar até 31 linhas (dias 1..31) da planilha de resumo; assumir que cada coluna tem os valores por dia
+        # Ajuste conforme a estrutura real do seu arquivo
+        # -------- TUE -----------
+        try:
+            col_B = df_safts.iloc[:, 1].fillna("")
+            col_C = df_safts.iloc[:, 2].fillna("")
+            col_D = df_safts.iloc[:, 3].fillna("")
+        except Exception as e:
+            print(f"Erro ao extrair colunas B,C,D: {e}")
+            raise
+
+        # -------- OESTE -----------
+        try:
+            col_F = df_safts.iloc[:, 5].fillna("")
+            col_G = df_safts.iloc[:, 6].fillna("")
+            col_H = df_safts.iloc[:, 7].fillna("")
+        except Exception as e:
+            print(f"Erro ao extrair colunas F,G,H: {e}")
+            raise
+
+        # -------- NORDESTE -----------
+        try:
+            col_J = df_safts.iloc[:, 9].fillna("")
+            col_K = df_safts.iloc[:, 10].fillna("")
+            col_L = df_safts.iloc[:, 11].fillna("")
+        except Exception as e:
+            print(f"Erro ao extrair colunas J,K,L: {e}")
+            raise
+
+        # -------- SOBRAL -----------
+        try:
+            col_N = df_safts.iloc[:, 13].fillna("")
+            col_O = df_safts.iloc[:, 14].fillna("")
+            col_P = df_safts.iloc[:, 15].fillna("")
+        except Exception as e:
+            print(f"Erro ao extrair colunas N,O,P: {e}")
+            raise
+
+        # -------- CARIRI -----------
+        try:
+            col_R = df_safts.iloc[:, 17].fillna("")
+            col_S = df_safts.iloc[:, 18].fillna("")
+            col_T = df_safts.iloc[:, 19].fillna("")
+        except Exception as e:
+            print(f"Erro ao extrair colunas R,S,T: {e}")
+            raise
+
+
+        # Preparar séries para níveis A (B), B (C), C (D)
+        # Detectar e pular linhas de cabeçalho (por exemplo, que contenham 'TUE', 'A', 'B', 'C')
+        header_labels = {'TUE', 'A', 'B', 'C', 'NÍVEL', 'NIVEL', "TUE", "NORDESTE", "OESTE", "SOBRAL", "CARIRI", ""}
+
+        # criar DataFrame com as três colunas lado a lado para inspeção de linhas iniciais
+        cols_df = pd.concat([col_B, col_C, col_D, col_F, col_G, col_H, col_O, col_P, col_R, col_S, col_T], axis=1)
+
+        # encontrar primeiro índice que não parece ser cabeçalho
+        start_idx = 0
+        for idx in range(len(cols_df)):
+            row_vals = cols_df.iloc[idx].astype(str).str.strip().str.upper().tolist()
+            # se todos os valores estão vazios ou em header_labels, considerar como linha de cabeçalho
+            all_header = all((v == '' or v in header_labels) for v in row_vals)
+            if not all_header:
+                start_idx = idx
+                break
+
+        if start_idx != 0:
+            print(f"Pulei {start_idx} linhas iniciais (prováveis cabeçalhos) antes de coletar os 31 dias.")
+
+        # -------- TUE -----------
+        series_TUE_A = col_B.iloc[start_idx:].reset_index(drop=True)
+        series_TUE_B = col_C.iloc[start_idx:].reset_index(drop=True)
+        series_TUE_C = col_D.iloc[start_idx:].reset_index(drop=True)
+
+        # -------- OESTE -----------
+        series_OESTE_A = col_F.iloc[start_idx:].reset_index(drop=True)
+        series_OESTE_B = col_G.iloc[start_idx:].reset_index(drop=True)
+        series_OESTE_C = col_H.iloc[start_idx:].reset_index(drop=True)
+
+        # -------- NORDESTE -----------
+        series_NORDESTE_A = col_J.iloc[start_idx:].reset_index(drop=True)
+        series_NORDESTE_B = col_K.iloc[start_idx:].reset_index(drop=True)
+        series_NORDESTE_C = col_L.iloc[start_idx:].reset_index(drop=True)
+
+        # -------- SOBRAL -----------
+        series_SOBRAL_A = col_N.iloc[start_idx:].reset_index(drop=True)
+        series_SOBRAL_B = col_O.iloc[start_idx:].reset_index(drop=True)
+        series_SOBRAL_C = col_P.iloc[start_idx:].reset_index(drop=True)
+
+        # -------- CARIRI -----------
+        series_CARIRI_A = col_R.iloc[start_idx:].reset_index(drop=True)
+        series_CARIRI_B = col_S.iloc[start_idx:].reset_index(drop=True)
+        series_CARIRI_C = col_T.iloc[start_idx:].reset_index(drop=True)
 
 
     # Abre o arquivo Excel que será preenchido (planilha do Farol)
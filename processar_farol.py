@@ -0,0 +1,113 @@
+import pathlib
+
+import data_mining_ssp
+from ingestao import ExportacaoSIMG, ler_em_paralelo
+from mining_combined import (COLUNAS_OSM, FILTROS_OSM, UnifiedSAFAnalyzer, categorias_simg,
+                             processar_exportacoes)
+from planilha import SessaoPlanilha
+from saidas import PASTA_SAIDAS, SaidasColunares
+from vinculos import VinculadorFalhas, colunas_vinculo
+
+
+def main():
+    """Processa as quatro exportações (SAF, OSM, SSP, OSP) em uma única execução.
+
+    Os CSVs são lidos ao mesmo tempo, um por processo (`ler_em_paralelo`), e
+    cada analisador recebe o DataFrame já tipado; o tempo de leitura fica
+    próximo ao do maior arquivo em vez da soma dos quatro.
+    """
+    try:
+        base = pathlib.Path.home() / "Downloads" / "Documentos - Farol"
+        template_path = base / "dados_resumo.xlsx"
+        output_path = base / "dados_resumo.xlsx"
+
+        # Intervalo de datas (mude conforme necessário; use formatos: '01-10-2025', '01102025' ou '01/10/2025')
+        min_date_str = '01-10-2025'
+        max_date_str = '31-10-2025'
+
+        # Totais de todo o intervalo (ex.: um trimestre) por 'D' (dia), 'W' (semana) ou 'M' (mês); None desliga
+        periodo_consolidado = None
+
+        # Motor de leitura dos CSVs: 'auto' (pyarrow quando instalado), 'pyarrow' ou 'c'
+        motor_csv = 'auto'
+
+        # Saídas colunares ao lado da planilha (pasta 'saidas'): 'parquet', 'csv' e/ou 'arrow'; [] desliga
+        formatos_saida = ['parquet']
+
+        # Número de processos de leitura (None = um por arquivo encontrado)
+        max_processos = None
+
+        # Aba 'Vínculos': cada SAF ligada à OSM que a atendeu e às preventivas (OSP/SSP) do veículo.
+        # Acrescenta à leitura de SAF/OSM só as colunas das ligações (números dos formulários, encerramento)
+        vincular_registros = True
+
+        # Arquivos esperados
+        saf_file = base / "SafCompleta.csv"
+        osm_file = base / "OsmCompleta.csv"
+        ssp_file = base / "SspCompleta.csv"
+        osp_file = base / "OspCompleta.csv"
+
+        tarefas = {}
+        if saf_file.exists():
+            colunas_saf = UnifiedSAFAnalyzer.COLUNAS + (colunas_vinculo(saf_file, 'saf') if vincular_registros else [])
+            tarefas['saf'] = dict(file_path=str(saf_file), colunas=colunas_saf, motor=motor_csv)
+        if osm_file.exists():
+            colunas_osm = COLUNAS_OSM + (colunas_vinculo(osm_file, 'osm') if vincular_registros else [])
+            tarefas['osm'] = dict(file_path=str(osm_file), colunas=colunas_osm, motor=motor_csv)
+        if ssp_file.exists():
+            tarefas['ssp'] = dict(file_path=str(ssp_file), detectar_data=data_mining_ssp.detectar_coluna_data_ssp,
+                                  dtype=None, motor=motor_csv)
+        if osp_file.exists():
+            tarefas['osp'] = dict(file_path=str(osp_file), motor=motor_csv)
+
+        if not tarefas:
+            print("Nenhuma exportação (SAF/OSM/SSP/OSP) encontrada no diretório esperado:", base)
+            return 1
+
+        print(f"Lendo {len(tarefas)} exportações em paralelo: {', '.join(tarefas)}")
+        lidos = ler_em_paralelo(tarefas, max_workers=max_processos)
+
+        saf_base = ExportacaoSIMG(str(saf_file), min_date=min_date_str, max_date=max_date_str,
+                                  colunas=UnifiedSAFAnalyzer.COLUNAS, categorias=categorias_simg(),
+                                  filtros=[UnifiedSAFAnalyzer.predicado(sem_falhas=False)],
+                                  dados=lidos['saf']) if 'saf' in lidos else None
+        osm_base = ExportacaoSIMG(str(osm_file), min_date=min_date_str, max_date=max_date_str,
+                                  colunas=COLUNAS_OSM, categorias=categorias_simg(),
+                                  filtros=FILTROS_OSM, dados=lidos['osm']) if 'osm' in lidos else None
+
+        # uma única sessão da planilha: carregada uma vez e gravada uma vez (atômica) ao final
+        saidas = SaidasColunares(base / PASTA_SAIDAS, formatos_saida)
+        with SessaoPlanilha(template_path, output_path) as sessao:
+            processar_exportacoes(saf_base, osm_base, str(saf_file), str(osm_file), min_date_str, max_date_str,
+                                  str(template_path), str(output_path), periodo_consolidado, sessao=sessao,
+                                  saidas=saidas)
+
+            if 'ssp' in lidos:
+                resultado = data_mining_ssp.analisar_ssp(lidos['ssp'][0])
+                if resultado is not None:
+                    data_mining_ssp.salvar_ssp(*resultado, output_path, sessao=sessao, saidas=saidas)
+
+            if vincular_registros and saf_base is not None:
+                # OSMs e preventivas sem filtro de data: podem estar fora do intervalo das SAFs
+                vinculador = VinculadorFalhas((saf_base.df, saf_base.date_col), osm=lidos.get('osm'),
+                                              preventivas={origem.upper(): lidos[origem] for origem in ('osp', 'ssp') if origem in lidos})
+                vinculos = vinculador.vincular()
+                if vinculos is not None:
+                    vinculador.salvar_na_planilha_existente(vinculos, str(template_path), str(output_path), sessao=sessao)
+
+        # OSP não tem analisador próprio; entra apenas no histórico de preventivas dos vínculos
+        if 'osp' in lidos:
+            print(f"OspCompleta.csv lido ({len(lidos['osp'][0])} registros).")
+
+        print("Processamento concluído com sucesso!")
+        return 0
+
+    except Exception as e:
+        print(f"Erro durante a execução: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
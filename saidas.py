@@ -0,0 +1,134 @@
+import os
+import pathlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Pasta das saídas colunares, ao lado de dados_resumo.xlsx
+PASTA_SAIDAS = 'saidas'
+
+# Extensão dos arquivos de cada formato
+EXTENSOES = {'parquet': '.parquet', 'csv': '.csv', 'arrow': '.arrow'}
+
+# Formatos gravados a partir da tabela Arrow (exigem o pyarrow)
+FORMATOS_PYARROW = ('parquet', 'arrow')
+
+
+def tabela_arrow(df: pd.DataFrame) -> 'pa.Table':
+    """Tabela Arrow de `df`, sem o índice, convertida uma única vez e compartilhada entre os formatos.
+
+    Colunas numéricas sem ausentes são aproveitadas sem cópia; categorias
+    viram colunas de dicionário. Colunas de objeto com tipos misturados (ex.:
+    números e textos no mesmo campo do SIMG) são gravadas como texto.
+    """
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mistas = {c: df[c].where(df[c].isna(), df[c].astype(str)) for c in df.columns if df[c].dtype == object}
+        return pa.Table.from_pandas(df.assign(**mistas), preserve_index=False)
+
+
+def _gravar_parquet(df: pd.DataFrame, tabela, path: pathlib.Path) -> None:
+    pq.write_table(tabela, path)
+
+
+def _gravar_arrow(df: pd.DataFrame, tabela, path: pathlib.Path) -> None:
+    # formato de arquivo IPC sem compressão: pode ser lido com memory-map, sem desserializar
+    with pa.OSFile(str(path), 'wb') as destino, pa.ipc.new_file(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+
+
+def _gravar_csv(df: pd.DataFrame, tabela, path: pathlib.Path) -> None:
+    df.to_csv(path, index=False)
+
+
+# Gravador de cada formato: (DataFrame, tabela Arrow ou None, caminho); novos formatos entram aqui
+GRAVADORES: Dict[str, Callable[[pd.DataFrame, Optional['pa.Table'], pathlib.Path], None]] = {
+    'parquet': _gravar_parquet,
+    'arrow': _gravar_arrow,
+    'csv': _gravar_csv,
+}
+
+
+class SaidasColunares:
+    """Destinos colunares (Parquet, CSV, Arrow IPC) gravados ao lado da planilha.
+
+    Cada resultado (grades diárias, 'Falhas', resumo e detalhes SSP) é
+    gravado em `pasta/<nome>.<extensão>` em todos os `formatos`, com as colunas
+    tipadas (datas continuam datas), para que outras ferramentas leiam os
+    dados sem abrir o xlsx. A conversão para Arrow é feita uma vez por
+    resultado e cada arquivo é trocado de forma atômica. Formatos que exigem
+    o pyarrow são ignorados, com aviso, quando ele não está instalado.
+    """
+
+    def __init__(self, pasta, formatos: Sequence[str] = ('parquet',)):
+        desconhecidos = [f for f in formatos if f not in GRAVADORES]
+        if desconhecidos:
+            raise ValueError(f"Formato(s) de saída desconhecido(s): {', '.join(desconhecidos)}")
+        self.pasta = pathlib.Path(pasta)
+        self.formatos = []
+        for formato in formatos:
+            if formato in FORMATOS_PYARROW and pa is None:
+                print(f"Aviso: saída '{formato}' requer o pacote pyarrow; ignorada.")
+                continue
+            self.formatos.append(formato)
+
+    def caminho(self, nome: str, formato: str) -> pathlib.Path:
+        return self.pasta / f"{nome}{EXTENSOES.get(formato, '.' + formato)}"
+
+    def gravar(self, nome: str, df: pd.DataFrame) -> List[pathlib.Path]:
+        """Grava `df` como `nome` em cada formato configurado e retorna os arquivos gerados."""
+        if not self.formatos:
+            return []
+        try:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            tabela = tabela_arrow(df) if any(f in FORMATOS_PYARROW for f in self.formatos) else None
+            gerados = []
+            for formato in self.formatos:
+                path = self.caminho(nome, formato)
+                tmp = path.with_name(f".{path.name}.tmp")
+                GRAVADORES[formato](df, tabela, tmp)
+                os.replace(tmp, path)
+                gerados.append(path)
+            print(f"Saída '{nome}' gravada ({len(df)} linhas): {', '.join(p.name for p in gerados)}")
+            return gerados
+
+        except Exception as e:
+            raise Exception(f"Erro ao gravar saída '{nome}': {str(e)}")
+
+
+def ler_saida(pasta, nome: str, formatos: Sequence[str] = ('arrow', 'parquet', 'csv'),
+              referencia=None) -> Optional[pd.DataFrame]:
+    """Lê o resultado `nome` do arquivo mais recente entre os `formatos` disponíveis em `pasta`.
+
+    Com `referencia` (ex.: dados_resumo.xlsx), retorna None se esse arquivo
+    for mais recente que a saída, que então está desatualizada (ex.: formato
+    desligado depois, ou planilha regravada por outro script); o chamador
+    deve ler a `referencia`. Também retorna None se não houver nenhuma saída.
+    """
+    pasta = pathlib.Path(pasta)
+    candidatos = [(pasta / f"{nome}{EXTENSOES[formato]}", formato) for formato in formatos
+                  if not (formato in FORMATOS_PYARROW and pa is None)]
+    candidatos = [(path.stat().st_mtime_ns, path, formato) for path, formato in candidatos if path.exists()]
+    if not candidatos:
+        return None
+    mtime, path, formato = max(candidatos, key=lambda c: c[0])
+
+    referencia = pathlib.Path(referencia) if referencia is not None else None
+    if referencia is not None and referencia.exists() and referencia.stat().st_mtime_ns > mtime:
+        print(f"Aviso: {path.name} é mais antigo que {referencia.name}; usando {referencia.name}.")
+        return None
+
+    if formato == 'arrow':
+        # memory-map: as colunas são lidas direto do arquivo, sem desserialização
+        return pa.ipc.open_file(pa.memory_map(str(path))).read_pandas()
+    if formato == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
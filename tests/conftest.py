@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# Permite importar os módulos da raiz do projeto (ex.: historico.py) ao rodar os testes
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
@@ -0,0 +1,23 @@
+import pytest
+
+import ingestao
+from cubo import CuboFalhas
+from ingestao import ExportacaoSIMG
+
+COLUNAS = ['Data de Abertura Saf', 'Grupo', 'Veiculo', 'Nível']
+
+
+@pytest.mark.skipif(ingestao.pyarrow is None, reason='requer o pyarrow')
+def test_cubo_reaproveitado_com_colunas_extras_na_base(tmp_path, capsys):
+    path = tmp_path / 'SafCompleta.csv'
+    path.write_text('Número Saf;Data de Abertura Saf;Grupo;Veiculo;Nível;Descrição\n'
+                    '1;01/10/2025 08:00;MATERIAL RODANTE - VLT;VLT01;A;porta\n'
+                    '2;02/10/2025 09:00;MATERIAL RODANTE - TUE;TUE;B;truque\n', encoding='utf-8')
+
+    cubo = CuboFalhas.da_exportacao(ExportacaoSIMG(str(path), colunas=COLUNAS))
+    # mesma exportação lida com colunas a mais (ex.: vínculos no processar_farol)
+    capsys.readouterr()
+    reaproveitado = CuboFalhas.da_exportacao(ExportacaoSIMG(str(path), colunas=COLUNAS + ['Número Saf', 'Descrição']))
+
+    assert 'Cubo reaproveitado' in capsys.readouterr().out
+    assert reaproveitado.df.equals(cubo.df)
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from historico import HistoricoSIMG
+
+
+def _exportacao(textos):
+    return pd.DataFrame({
+        'Número Saf': [str(i) for i in range(1, len(textos) + 1)],
+        'Data de Abertura Saf': pd.to_datetime(['01/10/2025 08:00'] * len(textos), dayfirst=True),
+        'Descrição': textos,
+    })
+
+
+def test_ingerir_preserva_separadores_de_linha_unicode(tmp_path):
+    # 0x85 lido como latin-1 vira U+0085 (NEL), que splitlines() também trata como quebra de linha
+    textos = ['porta\x85travada', 'ruído no truque', 'sem falha']
+    df = _exportacao(textos)
+
+    with HistoricoSIMG(str(tmp_path / 'historico.sqlite')) as historico:
+        contagens = historico.ingerir(df, 'saf', 'Data de Abertura Saf')
+        lido = historico.consultar('saf')
+
+    assert contagens == {'novos': 3, 'atualizados': 0, 'ignorados': 0}
+    assert lido['Número Saf'].tolist() == ['1', '2', '3']
+    assert lido['Descrição'].tolist() == textos
+    assert (lido['Data de Abertura Saf'] == df['Data de Abertura Saf']).all()
+
+
+def test_ingerir_incremental_atualiza_apenas_alterados(tmp_path):
+    df = _exportacao(['a', 'b', 'c'])
+
+    with HistoricoSIMG(str(tmp_path / 'historico.sqlite')) as historico:
+        historico.ingerir(df, 'saf', 'Data de Abertura Saf')
+        df.loc[1, 'Descrição'] = 'b\x85alterada'
+        contagens = historico.ingerir(df, 'saf', 'Data de Abertura Saf')
+        lido = historico.consultar('saf')
+
+    assert contagens == {'novos': 0, 'atualizados': 1, 'ignorados': 2}
+    assert lido['Descrição'].tolist() == ['a', 'b\x85alterada', 'c']
@@ -0,0 +1,21 @@
+import pytest
+
+import ingestao
+from ingestao import ler_csv_simg
+
+
+@pytest.mark.skipif(ingestao.pyarrow is None, reason='requer o pyarrow')
+def test_motor_pyarrow_volta_ao_motor_c_com_quebra_de_linha_entre_aspas(tmp_path):
+    # acima de um bloco do leitor do pyarrow (1 MB), a quebra de linha dentro do campo dessincroniza o chunker
+    path = tmp_path / 'saf.csv'
+    with open(path, 'w', encoding='latin-1', newline='') as f:
+        f.write('Número Saf;Descrição;Data de Abertura Saf\n')
+        for i in range(60000):
+            f.write(f'{i};"porta travada\nruído {i}";01/10/2025 08:00\n')
+
+    df, date_col = ler_csv_simg(path, encoding='latin-1', sep=';', motor='pyarrow', usar_cache=False)
+
+    assert date_col == 'Data de Abertura Saf'
+    assert len(df) == 60000
+    assert df['Descrição'].iloc[-1] == 'porta travada\nruído 59999'
+    assert df[date_col].notna().all()
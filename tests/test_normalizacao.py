@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+
+import data_mining_ssp
+from data_mining_ssp import normalizar_textos
+
+
+def test_normalizar_textos_remove_acentos_e_espacos(tmp_path):
+    resultado = normalizar_textos(pd.Series(['  Manutenção  preventiva diária', None]), tmp_path / 'memo.json')
+    assert resultado.iloc[0] == 'MANUTENCAO PREVENTIVA DIARIA'
+    assert pd.isna(resultado.iloc[1])
+
+
+def test_memo_descarta_os_usados_ha_mais_tempo(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_mining_ssp, 'MAX_TEXTOS_NORMALIZADOS', 3)
+    memo_path = tmp_path / 'memo.json'
+
+    normalizar_textos(pd.Series(['frequente']), memo_path)
+    for avulso in ['avulso 1', 'avulso 2']:
+        normalizar_textos(pd.Series([avulso]), memo_path)
+        # o valor usado em toda execução volta ao fim do memo, mesmo já conhecido
+        normalizar_textos(pd.Series(['frequente']), memo_path)
+    normalizar_textos(pd.Series(['avulso 3']), memo_path)
+
+    memo = json.loads(memo_path.read_text(encoding='utf-8'))
+    assert list(memo) == ['avulso 2', 'frequente', 'avulso 3']
+
+
+def test_analisar_ssp_normaliza_veiculos(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_mining_ssp, 'cache_normalizacao_path', tmp_path / 'memo.json')
+    df = pd.DataFrame({
+        'Serviço': ['Manutenção Preventiva Diária', 'MANUTENCAO PREVENTIVA SEMANAL', 'Outro serviço'],
+        'Veículo': ['vlt01 ', 'VLT01', 'VLT02'],
+        'Data': ['01/10/2025'] * 3,
+        'Status': ['Encerrada'] * 3,
+    })
+
+    resumo, detalhes = data_mining_ssp.analisar_ssp(df, tmp_path / 'colunas.json')
+
+    assert resumo['Veículo'].tolist() == ['VLT01', 'TOTAL']
+    assert resumo['MANUTENÇÃO PREVENTIVA DIÁRIA'].tolist() == [1, 1]
+    assert resumo['MANUTENÇÃO PREVENTIVA SEMANAL'].tolist() == [1, 1]
+    assert detalhes['Veículo'].tolist() == ['VLT01', 'VLT01']
+    assert detalhes['Status'].tolist() == ['Encerrada', 'Encerrada']
@@ -0,0 +1,127 @@
+"""Paridade das grades diárias e da aba 'Falhas' com as implementações originais.
+
+As referências abaixo repetem os laços da versão original (filtro por linha
+e contagem dia a dia; `iterrows` + `sort_values` na aba 'Falhas'). Cada
+caminho atual — leitura completa ou em blocos, contagem direta ou pelo cubo —
+precisa produzir o mesmo resultado.
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from cubo import CuboFalhas
+from ingestao import GRUPOS_PERMITIDOS, ExportacaoSIMG
+from mining_combined import (AGENTES_SEM_FALHA, COLUNAS_OSM, FILTROS_OSM, SAFComFalhasAnalyzer,
+                             UnifiedSAFAnalyzer, categorias_simg)
+
+VEICULOS = ['VLT01', 'VLT03', 'VLT07', 'VLT12', 'VLTS02', 'VLTS05', 'VLTC03', 'TRAM1', 'XPTO', 'TUE01']
+GRUPOS = GRUPOS_PERMITIDOS + ['OUTRO GRUPO']
+AGENTES = AGENTES_SEM_FALHA[:3] + ['FALHA DO EQUIPAMENTO'] * 3
+STATUS = ['Encerrada', 'Encerrada', 'Aberta']
+
+
+@pytest.fixture(scope='module')
+def exportacao(tmp_path_factory):
+    aleatorio = random.Random(11)
+    linhas = ['Número Saf;Data de Abertura Saf;Grupo;Veiculo;Nível;Nome Status;Agente Causador;Sistema;Sub Sistema']
+    for i in range(800):
+        data = f"{aleatorio.randint(1, 28):02d}/{aleatorio.choice([10, 11]):02d}/2025 {aleatorio.randint(0, 23):02d}:15"
+        if i % 97 == 0:
+            data = 'sem data'
+        linhas.append(';'.join([str(i), data, aleatorio.choice(GRUPOS), aleatorio.choice(VEICULOS),
+                                aleatorio.choice(['A', 'B', 'C', 'C']), aleatorio.choice(STATUS),
+                                aleatorio.choice(AGENTES), aleatorio.choice(['PORTAS', 'TRUQUE', 'FREIO']),
+                                aleatorio.choice(['MOTOR', 'SENSOR'])]))
+    path = tmp_path_factory.mktemp('paridade') / 'Completa.csv'
+    path.write_text('\n'.join(linhas) + '\n', encoding='latin-1')
+    return path
+
+
+def _base_original(path):
+    df = pd.read_csv(path, sep=';', encoding='latin-1', dtype=str)
+    df['Data de Abertura Saf'] = pd.to_datetime(df['Data de Abertura Saf'], format='%d/%m/%Y %H:%M', errors='coerce')
+    df = df.dropna(subset=['Data de Abertura Saf'])
+    return df[df['Grupo'].isin(GRUPOS_PERMITIDOS)]
+
+
+def _grades_original(df, sem_falhas):
+    if sem_falhas:
+        df = df[(df['Nome Status'] == 'Encerrada') & df['Agente Causador'].isin(AGENTES_SEM_FALHA)]
+    config = UnifiedSAFAnalyzer._get_linhas_config()
+    contadores = {nivel: pd.DataFrame(0, index=range(1, 32), columns=list(config)) for nivel in 'ABC'}
+    for linha, (grupo, veiculos) in config.items():
+        filtro = df['Grupo'] == grupo
+        if veiculos:
+            filtro = filtro & df['Veiculo'].isin(veiculos)
+        df_linha = df[filtro]
+        if df_linha.empty:
+            continue
+        datas = df_linha['Data de Abertura Saf']
+        mes, ano = datas.iloc[0].month, datas.iloc[0].year
+        for dia in range(1, 32):
+            df_dia = df_linha[(datas.dt.day == dia) & (datas.dt.month == mes) & (datas.dt.year == ano)]
+            if df_dia.empty:
+                continue
+            for nivel in 'ABC':
+                contadores[nivel].at[dia, linha] = len(df_dia[df_dia['Nível'] == nivel])
+    return contadores
+
+
+def _falhas_original(df):
+    df = df[(df['Nome Status'] == 'Encerrada') & (df['Agente Causador'] == 'FALHA DO EQUIPAMENTO')]
+    nomes = SAFComFalhasAnalyzer._get_linhas_config()
+    registros = []
+    for _, row in df.iterrows():
+        linha = 'Linha Sul' if row['Grupo'] == 'MATERIAL RODANTE - TUE' else next(
+            (nome for nome, veiculos in nomes.items() if row['Veiculo'] in veiculos), 'Outra Linha')
+        registros.append({'Data': row['Data de Abertura Saf'].strftime('%d/%m/%Y'), 'Veículo': row['Veiculo'],
+                          'Linha': linha, 'Nível': row['Nível'], 'Sistema': row['Sistema'],
+                          'Sub Sistema': row['Sub Sistema'], 'Agente Causador': row['Agente Causador']})
+    falhas = pd.DataFrame(registros)
+    falhas['Data'] = pd.to_datetime(falhas['Data'], dayfirst=True)
+    falhas = falhas.sort_values(['Data', 'Linha', 'Nível'])
+    falhas['Data'] = falhas['Data'].dt.strftime('%d/%m/%Y')
+    return falhas.reset_index(drop=True)
+
+
+def _exportacao(path, sem_falhas, tamanho_bloco):
+    if sem_falhas is None or sem_falhas:
+        return ExportacaoSIMG(str(path), colunas=COLUNAS_OSM, categorias=categorias_simg(), filtros=FILTROS_OSM,
+                              tamanho_bloco=tamanho_bloco)
+    return ExportacaoSIMG(str(path), colunas=UnifiedSAFAnalyzer.COLUNAS, categorias=categorias_simg(),
+                          filtros=[UnifiedSAFAnalyzer.predicado(False)], tamanho_bloco=tamanho_bloco)
+
+
+@pytest.mark.parametrize('sem_falhas', [False, True])
+@pytest.mark.parametrize('tamanho_bloco', [None, 64])
+@pytest.mark.parametrize('com_cubo', [False, True])
+def test_grades_diarias_iguais_a_original(exportacao, sem_falhas, tamanho_bloco, com_cubo):
+    base = _exportacao(exportacao, sem_falhas, tamanho_bloco)
+    cubo = CuboFalhas.construir(base.df, base.date_col) if com_cubo else None
+    analyzer = UnifiedSAFAnalyzer(str(exportacao), sem_falhas=sem_falhas, base=base, cubo=cubo)
+    analyzer.processar_todas_linhas()
+
+    esperado = _grades_original(_base_original(exportacao), sem_falhas)
+    for nivel in 'ABC':
+        pd.testing.assert_frame_equal(analyzer.contadores[nivel], esperado[nivel], check_dtype=False)
+
+
+@pytest.mark.parametrize('tamanho_bloco', [None, 64])
+def test_aba_falhas_igual_a_original(exportacao, tamanho_bloco):
+    analyzer = SAFComFalhasAnalyzer(str(exportacao), base=_exportacao(exportacao, None, tamanho_bloco))
+    falhas = analyzer.processar_falhas()[SAFComFalhasAnalyzer.COLUNAS_ABA]
+    falhas = falhas.assign(Data=falhas['Data'].dt.strftime('%d/%m/%Y')).astype(object)
+
+    pd.testing.assert_frame_equal(falhas, _falhas_original(_base_original(exportacao)).astype(object))
+
+
+@pytest.mark.parametrize('tamanho_bloco', [None, 64])
+def test_contagem_de_falhas_pelo_cubo_igual_a_direta(exportacao, tamanho_bloco):
+    base = _exportacao(exportacao, None, tamanho_bloco)
+    analyzer = SAFComFalhasAnalyzer(str(exportacao), base=base, cubo=CuboFalhas.construir(base.df, base.date_col))
+    contagem = analyzer.contar_falhas(['Veiculo', 'Sistema'])
+
+    df = analyzer.df
+    direta = df.groupby(['Veiculo', 'Sistema'], observed=True).size()
+    assert contagem.set_index(['Veiculo', 'Sistema'])['Quantidade'].to_dict() == direta[direta > 0].to_dict()
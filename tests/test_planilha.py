@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.packaging.custom import StringProperty
+from openpyxl.styles import Font
+
+from planilha import PREFIXO_FLUXO, SessaoPlanilha, escrever_aba
+
+
+def _detalhes(n=5):
+    return pd.DataFrame({
+        'Data': pd.to_datetime(['2025-10-01', None] + ['2025-10-03'] * (n - 2)),
+        'Veículo': ['VLT01', ' TUE ', 'a & <b>', None, 'VLTS02'][:n] + ['VLT02'] * (n - 5),
+        'Quantidade': [1, 2, 3, 4, 5][:n] + [6] * (n - 5),
+        'Taxa': [0.5, np.nan, 1.25, 2.0, 3.0][:n] + [1.0] * (n - 5),
+    })
+
+
+def _aba(path, sheet_name):
+    ws = load_workbook(path)[sheet_name]
+    return (list(ws.values), ws.freeze_panes, ws.auto_filter.ref,
+            {k: v.width for k, v in ws.column_dimensions.items()}, ws['A1'].font.bold, ws['A1'].fill.fgColor.rgb)
+
+
+def test_escrever_em_fluxo_igual_a_escrever_aba(tmp_path):
+    df = _detalhes()
+    for nome in ('fluxo', 'normal'):
+        path = tmp_path / f'{nome}.xlsx'
+        with SessaoPlanilha(path, path) as sessao:
+            sessao.wb.create_sheet('Grade')
+        with SessaoPlanilha(path, path) as sessao:
+            if nome == 'fluxo':
+                sessao.escrever_em_fluxo('Falhas', df, larguras=[12, 20, 10, 8], posicao=0)
+            else:
+                escrever_aba(sessao.wb, 'Falhas', df, larguras=[12, 20, 10, 8], posicao=0)
+            sessao.marcar_alterada('Falhas')
+
+    assert _aba(tmp_path / 'fluxo.xlsx', 'Falhas') == _aba(tmp_path / 'normal.xlsx', 'Falhas')
+    assert load_workbook(tmp_path / 'fluxo.xlsx').sheetnames == ['Falhas', 'Grade']
+
+
+def test_aba_em_fluxo_carregada_so_com_cabecalho_e_mantida(tmp_path):
+    path = tmp_path / 'dados_resumo.xlsx'
+    df = _detalhes(3000)
+    with SessaoPlanilha(path, path) as sessao:
+        sessao.wb.create_sheet('Grade')
+    with SessaoPlanilha(path, path) as sessao:
+        sessao.escrever_em_fluxo('Falhas', df)
+        sessao.marcar_alterada('Falhas')
+    antes = _aba(path, 'Falhas')
+
+    # outra aba muda; 'Falhas' não é redesenhada e as linhas vêm do arquivo anterior
+    with SessaoPlanilha(path, path) as sessao:
+        assert sessao.wb['Falhas'].max_row == 1
+        sessao.wb['Grade']['A1'] = 'alterada'
+        sessao.marcar_alterada('Grade')
+
+    assert _aba(path, 'Falhas') == antes
+    assert len(antes[0]) == 3001
+    assert load_workbook(path)['Grade']['A1'].value == 'alterada'
+
+
+def test_aba_marcada_com_linhas_estilizadas_carregada_inteira(tmp_path):
+    # ex.: aba regravada fora do Farol, com estilos nas linhas de dados
+    path = tmp_path / 'dados_resumo.xlsx'
+    with SessaoPlanilha(path, path) as sessao:
+        escrever_aba(sessao.wb, 'Falhas', _detalhes())
+        sessao.marcar_alterada('Falhas')
+    wb = load_workbook(path)
+    wb['Falhas']['B2'].font = Font(italic=True)
+    wb.custom_doc_props.append(StringProperty(name=PREFIXO_FLUXO + 'Falhas', value='1'))
+    wb.save(path)
+
+    with SessaoPlanilha(path, path) as sessao:
+        assert sessao.wb['Falhas'].max_row == 6
+        sessao.marcar_alterada('Outra')
+
+    assert load_workbook(path)['Falhas']['B2'].font.italic
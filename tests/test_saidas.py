@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+import pytest
+
+from planilha import SessaoPlanilha
+from saidas import SaidasColunares, ler_saida
+
+
+def _envelhecer(path, segundos):
+    mtime = path.stat().st_mtime - segundos
+    os.utime(path, (mtime, mtime))
+
+
+def test_ler_saida_usa_arquivo_mais_recente(tmp_path):
+    SaidasColunares(tmp_path, ['csv']).gravar('grade', pd.DataFrame({'TUE A': [1, 2]}))
+    _envelhecer(tmp_path / 'grade.csv', 60)
+    SaidasColunares(tmp_path, ['parquet']).gravar('grade', pd.DataFrame({'TUE A': [3, 4]}))
+
+    assert ler_saida(tmp_path, 'grade')['TUE A'].tolist() == [3, 4]
+
+
+def test_ler_saida_descarta_saida_mais_antiga_que_referencia(tmp_path):
+    SaidasColunares(tmp_path, ['csv']).gravar('grade', pd.DataFrame({'TUE A': [1]}))
+    _envelhecer(tmp_path / 'grade.csv', 60)
+    planilha = tmp_path / 'dados_resumo.xlsx'
+    planilha.write_bytes(b'')
+
+    assert ler_saida(tmp_path, 'grade', referencia=planilha) is None
+    assert ler_saida(tmp_path, 'grade') is not None
+
+
+def test_saidas_so_gravadas_apos_salvar_planilha(tmp_path):
+    saidas = SaidasColunares(tmp_path / 'saidas', ['csv'])
+    output = tmp_path / 'dados_resumo.xlsx'
+
+    with pytest.raises(RuntimeError):
+        with SessaoPlanilha(output, output) as sessao:
+            sessao.ao_salvar(lambda: saidas.gravar('grade', pd.DataFrame({'TUE A': [1]})))
+            raise RuntimeError('falha no meio da execução')
+    assert not (tmp_path / 'saidas' / 'grade.csv').exists()
+
+    with SessaoPlanilha(output, output) as sessao:
+        sessao.ao_salvar(lambda: saidas.gravar('grade', pd.DataFrame({'TUE A': [1]})))
+    assert output.exists()
+    assert (tmp_path / 'saidas' / 'grade.csv').stat().st_mtime_ns >= output.stat().st_mtime_ns
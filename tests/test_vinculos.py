@@ -0,0 +1,36 @@
+import pandas as pd
+
+from vinculos import VinculadorFalhas
+
+
+def _safs(numero_col='Número Saf'):
+    return pd.DataFrame({
+        numero_col: ['1'],
+        'Data de Abertura Saf': pd.to_datetime(['20/10/2025'], dayfirst=True),
+        'Grupo': ['MATERIAL RODANTE - VLT'],
+        'Veiculo': ['VLT01'],
+        'Nível': ['A'],
+        'Nome Status': ['Encerrada'],
+    })
+
+
+def test_vinculo_descreve_uma_unica_osm():
+    osm = pd.DataFrame({
+        'Número OSM': ['10', '11'],
+        'Número Saf': ['1', '1'],
+        'Nome Status': ['Encerrada', 'Cancelada'],
+        'Data de Encerramento': pd.to_datetime(['25/10/2025', '22/10/2025'], dayfirst=True),
+    })
+    vinculos = VinculadorFalhas((_safs(), 'Data de Abertura Saf'), osm=(osm, 'Data de Encerramento')).vincular()
+
+    linha = vinculos.iloc[0]
+    assert linha['Número OSM'] == '10'
+    assert linha['Status OSM'] == 'Encerrada'
+    assert linha['Encerramento'] == pd.Timestamp('2025-10-25')
+    assert linha['OSMs'] == 2
+    assert linha['Dias até Encerramento'] == 5.0
+
+
+def test_sem_numero_da_saf_nao_gera_vinculos():
+    vinculador = VinculadorFalhas((_safs('Protocolo'), 'Data de Abertura Saf'))
+    assert vinculador.vincular() is None
@@ -0,0 +1,197 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import frota
+from data_mining_ssp import normalize_text, normalizar_textos
+from historico import detectar_coluna_numero
+from ingestao import ALIASES_COLUNAS, detectar_formato
+from planilha import SessaoPlanilha, escrever_aba, impressao_dados
+
+# Janela (em dias) da contagem de preventivas anteriores a cada falha
+JANELA_PREVENTIVAS_DIAS = 30
+
+# Termos que identificam a coluna de data de encerramento da OSM
+TERMOS_ENCERRAMENTO = ['ENCERRA', 'FECHAMENTO', 'CONCLUS', 'FINALIZ']
+
+
+def detectar_coluna_veiculo(colunas: Sequence[str]) -> Optional[str]:
+    """Coluna de veículo ('Veiculo' ou 'Veículo', ver `ALIASES_COLUNAS`)."""
+    return next((c for c in ALIASES_COLUNAS['Veiculo'] if c in colunas), None)
+
+
+def detectar_coluna_encerramento(colunas: Sequence[str]) -> Optional[str]:
+    """Coluna com a data de encerramento da OSM (ex.: 'Data de Encerramento')."""
+    for c in colunas:
+        n = normalize_text(c)
+        if 'DATA' in n and any(termo in n for termo in TERMOS_ENCERRAMENTO):
+            return c
+    return None
+
+
+def colunas_vinculo(file_path, tipo: str) -> List[str]:
+    """Colunas extras da exportação ('saf' ou 'osm') usadas nos vínculos, lidas do cabeçalho do CSV.
+
+    Somadas às colunas dos analisadores, mantêm a projeção na leitura: só os
+    números dos formulários, o status e (nas OSMs) a data de encerramento.
+    """
+    encoding, sep = detectar_formato(file_path)
+    cabecalho = [c.strip() for c in pd.read_csv(file_path, encoding=encoding, sep=sep, nrows=0).columns]
+    if tipo == 'saf':
+        colunas = [detectar_coluna_numero(cabecalho, 'saf')]
+    else:
+        colunas = [detectar_coluna_numero(cabecalho, 'saf', estrito=True),
+                   detectar_coluna_numero(cabecalho, 'osm', estrito=True), detectar_coluna_encerramento(cabecalho)]
+    return [c for c in colunas if c] + ['Nome Status']
+
+
+class VinculadorFalhas:
+    """Liga cada SAF à OSM que a atendeu e ao histórico de preventivas (OSP/SSP) do veículo.
+
+    As ligações usam junções por hash, sem laços aninhados: as OSMs são
+    indexadas pelo número da SAF (`groupby` + `merge`) e as preventivas
+    são buscadas por veículo e data com `merge_asof` (última preventiva e
+    quantidade nos `JANELA_PREVENTIVAS_DIAS` dias anteriores). O custo cresce
+    linearmente com o número de registros (mais a ordenação por data).
+
+    `saf` é o par (DataFrame, coluna de data) já filtrado pelo período;
+    `osm` e as `preventivas` ('OSP', 'SSP' -> par) vêm sem filtro de data,
+    pois a OSM ou a preventiva pode estar fora do intervalo das SAFs.
+    """
+
+    COLUNAS = ['Número SAF', 'Abertura SAF', 'Veículo', 'Linha', 'Nível', 'Status SAF',
+               'Número OSM', 'OSMs', 'Status OSM', 'Encerramento', 'Dias até Encerramento',
+               'Última Preventiva', 'Origem Preventiva', 'Dias desde Preventiva',
+               f'Preventivas ({JANELA_PREVENTIVAS_DIAS} dias)']
+
+    def __init__(self, saf: Tuple[pd.DataFrame, str], osm: Optional[Tuple[pd.DataFrame, str]] = None,
+                 preventivas: Optional[Dict[str, Tuple[pd.DataFrame, str]]] = None):
+        self.saf_df, self.saf_date_col = saf
+        self.osm = osm
+        self.preventivas = preventivas or {}
+
+    def _indice_osm(self) -> Optional[pd.DataFrame]:
+        """OSMs agregadas por número da SAF (índice hash): última OSM, quantidade, status e encerramento."""
+        if self.osm is None:
+            return None
+        df, date_col = self.osm
+        chave = detectar_coluna_numero(df.columns, 'saf', estrito=True)
+        if chave is None:
+            print("Aviso: exportação de OSMs sem o número da SAF; vínculo SAF -> OSM ignorado.")
+            return None
+
+        numero_osm = detectar_coluna_numero(df.columns, 'osm', estrito=True)
+        encerramento = detectar_coluna_encerramento(df.columns)
+        osm = pd.DataFrame({
+            'saf': df[chave].astype(str).str.strip(),
+            'Número OSM': df[numero_osm].astype(str).str.strip() if numero_osm else None,
+            'Status OSM': df['Nome Status'].astype(object) if 'Nome Status' in df.columns else None,
+            'Encerramento': df[encerramento] if encerramento else pd.NaT,
+        })
+        if encerramento and not pd.api.types.is_datetime64_any_dtype(osm['Encerramento']):
+            osm['Encerramento'] = pd.to_datetime(osm['Encerramento'], dayfirst=True, errors='coerce')
+
+        # todas as colunas descrevem a mesma OSM: a de encerramento mais recente (sem encerramento fica antes)
+        quantidade = osm.groupby('saf', sort=False).size()
+        ultima = (osm.sort_values('Encerramento', na_position='first', kind='stable')
+                  .drop_duplicates('saf', keep='last').set_index('saf'))
+        return ultima.assign(OSMs=quantidade)[['Número OSM', 'OSMs', 'Status OSM', 'Encerramento']]
+
+    def _historico_preventivas(self) -> pd.DataFrame:
+        """Preventivas de todas as origens em uma tabela (veículo, data, origem), ordenada por data."""
+        partes = []
+        for origem, (df, date_col) in self.preventivas.items():
+            veiculo_col = detectar_coluna_veiculo(df.columns)
+            if veiculo_col is None or date_col is None:
+                print(f"Aviso: {origem} sem coluna de veículo ou data; ignorada no histórico de preventivas.")
+                continue
+            mascara = df[date_col].notna() & df[veiculo_col].notna()
+            # com coluna de serviço, só entram as manutenções preventivas
+            servico_col = next((c for c in df.columns if 'servi' in c.lower()), None)
+            if servico_col is not None:
+                mascara &= normalizar_textos(df[servico_col]).str.contains('PREVENT', regex=False, na=False)
+            partes.append(pd.DataFrame({'veiculo': df.loc[mascara, veiculo_col].astype(str),
+                                        'data': df.loc[mascara, date_col].astype('datetime64[ns]'), 'origem': origem}))
+
+        if not partes:
+            return pd.DataFrame({'veiculo': pd.Series(dtype=object), 'data': pd.Series(dtype='datetime64[ns]'),
+                                 'origem': pd.Series(dtype=object)})
+        historico = pd.concat(partes, ignore_index=True).sort_values('data', kind='stable', ignore_index=True)
+        historico['acumulado'] = historico.groupby('veiculo', sort=False).cumcount() + 1
+        return historico
+
+    def vincular(self) -> Optional[pd.DataFrame]:
+        """Uma linha por SAF com abertura, OSM, encerramento e preventivas anteriores do veículo.
+
+        Retorna None (com aviso) se a exportação de SAFs não tiver o número da SAF.
+        """
+        print("Vinculando SAFs, OSMs e preventivas...")
+        df = self.saf_df
+        numero_saf = detectar_coluna_numero(df.columns, 'saf')
+        if numero_saf is None:
+            print("Aviso: exportação de SAFs sem o número da SAF; aba 'Vínculos' não gerada.")
+            return None
+        veiculo_col = detectar_coluna_veiculo(df.columns)
+
+        linha = frota.classificar(df, exigir_grupo=False).astype(object).map(frota.LINHA_NOME).fillna(frota.OUTRA_LINHA)
+        vinculos = pd.DataFrame({
+            'Número SAF': df[numero_saf].astype(str).str.strip(),
+            'Abertura SAF': df[self.saf_date_col],
+            'Veículo': df[veiculo_col].astype(object) if veiculo_col else None,
+            'Linha': linha,
+            'Nível': df['Nível'].astype(object) if 'Nível' in df.columns else None,
+            'Status SAF': df['Nome Status'].astype(object) if 'Nome Status' in df.columns else None,
+        }).reset_index(drop=True)
+
+        # SAF -> OSM: junção por hash sobre o número da SAF
+        indice = self._indice_osm()
+        if indice is not None:
+            vinculos = vinculos.merge(indice, left_on='Número SAF', right_index=True, how='left')
+            dias = (vinculos['Encerramento'] - vinculos['Abertura SAF']).dt.total_seconds() / 86400
+            vinculos['Dias até Encerramento'] = dias.round(1)
+
+        # SAF -> preventivas do mesmo veículo: última antes da abertura e quantidade na janela
+        historico = self._historico_preventivas()
+        if not historico.empty and veiculo_col:
+            chaves = pd.DataFrame({'pos': np.arange(len(vinculos)), 'veiculo': vinculos['Veículo'].astype(str),
+                                   'data': vinculos['Abertura SAF'].astype('datetime64[ns]')}).dropna(subset=['data'])
+            chaves = chaves.sort_values('data', kind='stable')
+            historico = historico.rename(columns={'data': 'preventiva'})
+            ultima = pd.merge_asof(chaves, historico, left_on='data', right_on='preventiva', by='veiculo',
+                                   direction='backward')
+            inicio = chaves.assign(data=chaves['data'] - pd.Timedelta(days=JANELA_PREVENTIVAS_DIAS))
+            anteriores = pd.merge_asof(inicio, historico[['veiculo', 'preventiva', 'acumulado']],
+                                       left_on='data', right_on='preventiva', by='veiculo', direction='backward')
+
+            # de volta à ordem das SAFs (SAFs sem data ficam sem preventiva)
+            ultima = ultima.set_index('pos').reindex(vinculos.index)
+            anteriores = anteriores.set_index('pos').reindex(vinculos.index)
+            vinculos['Última Preventiva'] = ultima['preventiva']
+            vinculos['Origem Preventiva'] = ultima['origem']
+            vinculos[f'Preventivas ({JANELA_PREVENTIVAS_DIAS} dias)'] = (
+                ultima['acumulado'].fillna(0) - anteriores['acumulado'].fillna(0)).where(ultima['data'].notna())
+            dias = (vinculos['Abertura SAF'] - vinculos['Última Preventiva']).dt.total_seconds() / 86400
+            vinculos['Dias desde Preventiva'] = dias.round(1)
+
+        vinculos = vinculos.reindex(columns=self.COLUNAS)
+        # contagens inteiras mesmo com SAFs sem OSM/preventiva (ausentes ficam em branco na planilha)
+        for col in ['OSMs', f'Preventivas ({JANELA_PREVENTIVAS_DIAS} dias)']:
+            vinculos[col] = vinculos[col].astype('Int64')
+        ligadas = vinculos['Número OSM'].notna().sum() if indice is not None else 0
+        print(f"Vínculos concluídos: {len(vinculos)} SAFs, {ligadas} com OSM, "
+              f"{vinculos['Última Preventiva'].notna().sum()} com preventiva anterior.")
+        return vinculos
+
+    def salvar_na_planilha_existente(self, df_vinculos: pd.DataFrame, template_path: str, output_path: str,
+                                     sheet_name: str = 'Vínculos', sessao: Optional[SessaoPlanilha] = None) -> None:
+        try:
+            larguras = [max(12, len(header) + 2) for header in df_vinculos.columns]
+            # datas formatadas na escrita; valores ausentes ficam em branco
+            with SessaoPlanilha.usar(sessao, template_path, output_path) as sessao:
+                if sessao.renderizar(sheet_name, impressao_dados(df_vinculos),
+                                     lambda wb: escrever_aba(wb, sheet_name, df_vinculos, larguras=larguras, em_branco=True)):
+                    print(f"Vínculos salvos: {output_path} (aba: {sheet_name})")
+
+        except Exception as e:
+            raise Exception(f"Erro ao salvar vínculos: {str(e)}")